@@ -0,0 +1,27 @@
+"""Optional native build of the hot paths with mypyc.
+
+The pure-Python modules work as-is; compiling is only worth it for
+high-throughput callers. Build the extensions next to the source so
+``import sort_packages`` picks up the compiled module:
+
+    pip install mypy
+    python setup.py build_ext --inplace
+
+Only ``sort_packages.py`` and ``vision_dims.py`` (the Gemini response
+checks) are compiled. ``vision.py`` is mostly I/O and stays
+interpreted, so tests can still patch its functions.
+
+Delete the generated ``*.so`` files to go back to the pure-Python
+modules.
+"""
+
+from mypyc.build import mypycify
+from setuptools import setup
+
+setup(
+    name="thoughtful-sorting",
+    ext_modules=mypycify([
+        "sort_packages.py",
+        "vision_dims.py",
+    ]),
+)
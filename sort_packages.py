@@ -1,9 +1,199 @@
 """Package sorting module for Thoughtful's robotic automation factory."""
 
-import math
+import functools
+from collections.abc import ItemsView, Iterator, KeysView, Mapping, ValuesView
+from dataclasses import dataclass
+from typing import Any, Final, NoReturn, cast
 
+_STACKS = ("STANDARD", "SPECIAL", "REJECTED")
 
-def sort(width: float, height: float, length: float, mass: float) -> str:
+# The sorting rule, shared by every classifier below. A package is
+# bulky if any side or its volume reaches the limit, and heavy if its
+# mass does. Final lets mypyc inline the values.
+_BULKY_SIDE_CM: Final = 150
+_BULKY_VOLUME_CM3: Final = 1_000_000
+_HEAVY_KG: Final = 20
+
+_INF = float("inf")
+
+
+def _is_number(value: object) -> bool:
+    """Return True for int and float values, including subclasses."""
+    return isinstance(value, (int, float)) and type(value) is not bool
+
+
+def _raise_invalid(name: str, value: object) -> NoReturn:
+    """Raise the ValueError for a value that failed validation.
+
+    Kept out of _validate so building the message costs nothing
+    unless a check has already failed.
+
+    Args:
+        name: Parameter name used in the error message.
+        value: The rejected value.
+
+    Raises:
+        ValueError: Always, with a message explaining the problem.
+    """
+    if not _is_number(value):
+        raise ValueError(
+            f"{name} must be a number, got {type(value).__name__}"
+        )
+    if value != value:
+        raise ValueError(f"{name} must be a number, got nan")
+    if value == _INF or value == -_INF:
+        raise ValueError(f"{name} must be finite, got {value}")
+    raise ValueError(f"{name} must be positive, got {value}")
+
+
+def _validate(
+    width: object, height: object, length: object, mass: object,
+) -> tuple[float, float, float, float] | None:
+    """Check that every dimension and the mass is a positive number.
+
+    Args:
+        width: Package width in centimeters.
+        height: Package height in centimeters.
+        length: Package length in centimeters.
+        mass: Package mass in kilograms.
+
+    Returns:
+        None if every value is a plain int or float, otherwise the
+        values converted to plain numbers (see _validate_slow).
+
+    Raises:
+        ValueError: If any value is not a positive, finite number.
+    """
+    # Unrolled so the success path is straight-line comparisons.
+    # Exact type identity beats isinstance() and set membership and
+    # lets mypy narrow the types for the compiled build. Anything
+    # else (bool, NumPy scalars, bad values) takes the slow path,
+    # which also works out the specific error message.
+    if (type(width) is not float and type(width) is not int
+            or not 0 < width < _INF):
+        return _validate_slow(width, height, length, mass)
+    if (type(height) is not float and type(height) is not int
+            or not 0 < height < _INF):
+        return _validate_slow(width, height, length, mass)
+    if (type(length) is not float and type(length) is not int
+            or not 0 < length < _INF):
+        return _validate_slow(width, height, length, mass)
+    if (type(mass) is not float and type(mass) is not int
+            or not 0 < mass < _INF):
+        return _validate_slow(width, height, length, mass)
+    return None
+
+
+def _validate_slow(
+    width: object, height: object, length: object, mass: object,
+) -> tuple[float, float, float, float]:
+    """Validate values that failed _validate's exact-type fast path.
+
+    Accepts int and float subclasses such as numpy.float64, which
+    are converted to plain numbers so later comparisons return
+    plain bools.
+
+    Returns:
+        The (width, height, length, mass) as plain ints/floats.
+
+    Raises:
+        ValueError: For the first value, in argument order, that is
+            not a positive, finite number.
+    """
+    numbers: list[float] = []
+    for name, value in (
+        ("width", width), ("height", height),
+        ("length", length), ("mass", mass),
+    ):
+        if not _is_number(value):
+            _raise_invalid(name, value)
+        number = (
+            float(cast(float, value)) if isinstance(value, float)
+            else int(cast(int, value))
+        )
+        if not 0 < number < _INF:
+            _raise_invalid(name, number)
+        numbers.append(number)
+    return numbers[0], numbers[1], numbers[2], numbers[3]
+
+
+def _classify(
+    width: float, height: float, length: float, mass: float,
+) -> int:
+    """Classify a validated package as an index into _STACKS.
+
+    Args:
+        width: Package width in centimeters.
+        height: Package height in centimeters.
+        length: Package length in centimeters.
+        mass: Package mass in kilograms.
+
+    Returns:
+        0 (STANDARD), 1 (SPECIAL), or 2 (REJECTED).
+    """
+    # A single long side settles it without the volume multiply.
+    bulky = (
+        width >= _BULKY_SIDE_CM or height >= _BULKY_SIDE_CM
+        or length >= _BULKY_SIDE_CM
+        or width * height * length >= _BULKY_VOLUME_CM3
+    )
+    heavy = mass >= _HEAVY_KG
+    # bool + bool is 0, 1 or 2: a branch-free index into _STACKS.
+    return bulky + heavy
+
+
+def _classify_core(
+    width: object, height: object, length: object, mass: object,
+) -> tuple[str, float, bool, bool]:
+    """Validate a package and classify it in a single pass.
+
+    Args:
+        width: Package width in centimeters.
+        height: Package height in centimeters.
+        length: Package length in centimeters.
+        mass: Package mass in kilograms.
+
+    Returns:
+        A (stack, volume, is_bulky, is_heavy) tuple.
+
+    Raises:
+        ValueError: If any value is not a positive, finite number.
+    """
+    normalized = _validate(width, height, length, mass)
+    if normalized is not None:
+        width, height, length, mass = normalized
+    w = cast(float, width)
+    h = cast(float, height)
+    l = cast(float, length)
+    volume = w * h * l
+    bulky = (
+        w >= _BULKY_SIDE_CM or h >= _BULKY_SIDE_CM or l >= _BULKY_SIDE_CM
+        or volume >= _BULKY_VOLUME_CM3
+    )
+    heavy = cast(float, mass) >= _HEAVY_KG
+    return _STACKS[bulky + heavy], volume, bulky, heavy
+
+
+# Conveyor workloads repeat the same SKU dimensions constantly, so
+# results are memoized. typed=True keeps True and 1 (equal hashes)
+# in separate entries, so bools still reach validation and raise.
+@functools.lru_cache(maxsize=4096, typed=True)
+def _sort_cached(
+    width: object, height: object, length: object, mass: object,
+) -> str:
+    """Memoized body of sort(); see sort() for the arguments."""
+    normalized = _validate(width, height, length, mass)
+    if normalized is not None:
+        width, height, length, mass = normalized
+    # The casts are free in CPython; under mypyc they let _classify
+    # run on unboxed doubles once _validate has checked the types.
+    return _STACKS[_classify(
+        cast(float, width), cast(float, height),
+        cast(float, length), cast(float, mass),
+    )]
+
+
+def sort(width: object, height: object, length: object, mass: object) -> str:
     """Dispatch a package to the correct stack based on dimensions and mass.
 
     Args:
@@ -18,41 +208,200 @@ def sort(width: float, height: float, length: float, mass: float) -> str:
     Raises:
         ValueError: If any dimension or mass is not a positive number.
     """
-    params = [
-        ("width", width),
-        ("height", height),
-        ("length", length),
-        ("mass", mass),
-    ]
-
-    for name, value in params:
-        if isinstance(value, bool) or not isinstance(value, (int, float)):
-            raise ValueError(
-                f"{name} must be a number, got {type(value).__name__}"
-            )
-        if math.isnan(value):
-            raise ValueError(f"{name} must be a number, got nan")
-        if math.isinf(value):
-            raise ValueError(
-                f"{name} must be finite, got {value}"
-            )
-        if value <= 0:
-            raise ValueError(
-                f"{name} must be positive, got {value}"
-            )
-
-    volume = width * height * length
-    bulky = volume >= 1_000_000 or max(width, height, length) >= 150
-    heavy = mass >= 20
-
-    return "REJECTED" if (bulky and heavy) else "SPECIAL" if (bulky or heavy) else "STANDARD"
+    try:
+        return _sort_cached(width, height, length, mass)
+    except TypeError:
+        # An unhashable argument (e.g. a list) cannot be a cache key.
+        # It is never a valid number, so this raises the ValueError.
+        _validate(width, height, length, mass)
+        raise
+
+
+def sort_fast(width: float, height: float, length: float, mass: float) -> str:
+    """Dispatch a package that is already known to be valid.
+
+    Skips all validation, so it is only for inputs that have been
+    checked upstream (e.g. rows already validated in a database).
+    Every value must be a positive, finite int or float; anything
+    else gives an undefined result instead of an error.
+
+    Args:
+        width: Package width in centimeters.
+        height: Package height in centimeters.
+        length: Package length in centimeters.
+        mass: Package mass in kilograms.
+
+    Returns:
+        "STANDARD", "SPECIAL", or "REJECTED".
+    """
+    return _STACKS[_classify(width, height, length, mass)]
+
+
+def sort_batch(widths, heights, lengths, masses):
+    """Dispatch many packages at once using vectorized NumPy math.
+
+    Equivalent to calling sort() on each row, but the per-package
+    cost only pays off for large batches (roughly 1000+ packages).
+
+    Args:
+        widths: Array-like of package widths in centimeters.
+        heights: Array-like of package heights in centimeters.
+        lengths: Array-like of package lengths in centimeters.
+        masses: Array-like of package masses in kilograms.
+
+    Returns:
+        A NumPy array of "STANDARD", "SPECIAL", or "REJECTED"
+        strings with the same shape as the inputs.
+
+    Raises:
+        ValueError: If the inputs differ in shape or any value is
+            not a positive, finite number.
+    """
+    import numpy as np
+
+    columns = [np.asarray(a) for a in (widths, heights, lengths, masses)]
+    if not (columns[0].shape == columns[1].shape
+            == columns[2].shape == columns[3].shape):
+        raise ValueError(
+            "widths, heights, lengths and masses must have the same shape"
+        )
+
+    stacks = np.array(_STACKS)
+    if any(c.dtype.kind not in "iuf" for c in columns):
+        # Strings, bools, objects: converting to float would accept
+        # "10" and True, so let sort() judge the original values.
+        # Its answers are the result; there is nothing to vectorize.
+        rows = zip(*(c.ravel().tolist() for c in columns))
+        return np.array(
+            [sort(*row) for row in rows], dtype=stacks.dtype,
+        ).reshape(columns[0].shape)
+
+    w, h, l, m = (c.astype(np.float64, copy=False) for c in columns)
+
+    if not all(np.isfinite(a).all() and (a > 0).all() for a in (w, h, l, m)):
+        # Re-check row by row so the error names the bad field.
+        for row in zip(w.flat, h.flat, l.flat, m.flat):
+            sort(*(float(value) for value in row))
+
+    bulky = (
+        (np.fmax(np.fmax(w, h), l) >= _BULKY_SIDE_CM)
+        | (w * h * l >= _BULKY_VOLUME_CM3)
+    )
+    heavy = m >= _HEAVY_KG
+    return stacks[bulky.astype(np.int8) + heavy]
+
+
+@dataclass(frozen=True, slots=True)
+class Dimensions:
+    """Package dimensions in centimeters.
+
+    Values are floats, or the raw inputs if validation failed.
+    """
+
+    width: Any
+    height: Any
+    length: Any
+
+
+# Keys of the dict that sort_with_details() used to return, in order.
+_RESULT_KEYS = (
+    "stack", "dimensions", "volume_cm3", "mass_kg", "is_bulky", "is_heavy",
+)
+_RESULT_FIELDS = frozenset(_RESULT_KEYS) - {"dimensions"}
+
+
+@dataclass(frozen=True, slots=True)
+class SortResult:
+    """Detailed breakdown of a sorting decision.
+
+    Also a read-only Mapping with the keys of the dict returned
+    previously, so result["stack"], "stack" in result, get(),
+    items() and dict(result) keep working.
+
+    Attributes:
+        stack: "STANDARD", "SPECIAL", or "REJECTED".
+        dimensions: The package Dimensions.
+        volume_cm3: float or None if inputs are invalid.
+        mass_kg: float, or the mass as given if inputs are invalid.
+        is_bulky: bool or None if inputs are invalid.
+        is_heavy: bool or None if inputs are invalid.
+    """
+
+    stack: str
+    dimensions: Dimensions
+    volume_cm3: float | None
+    mass_kg: Any
+    is_bulky: bool | None
+    is_heavy: bool | None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the result as a plain dict with nested dimensions."""
+        dims = self.dimensions
+        return {
+            "stack": self.stack,
+            "dimensions": {
+                "width": dims.width,
+                "height": dims.height,
+                "length": dims.length,
+            },
+            "volume_cm3": self.volume_cm3,
+            "mass_kg": self.mass_kg,
+            "is_bulky": self.is_bulky,
+            "is_heavy": self.is_heavy,
+        }
+
+    # Fields are read directly; only "dimensions" builds a dict, so
+    # result["stack"] costs about as much as result.stack.
+    def __getitem__(self, key: str) -> Any:
+        """Return the field named key, with dimensions as a dict."""
+        if key in _RESULT_FIELDS:
+            return getattr(self, key)
+        if key == "dimensions":
+            dims = self.dimensions
+            return {
+                "width": dims.width,
+                "height": dims.height,
+                "length": dims.length,
+            }
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(_RESULT_KEYS)
+
+    def __len__(self) -> int:
+        return len(_RESULT_KEYS)
+
+    def __contains__(self, key: object) -> bool:
+        return key in _RESULT_KEYS
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return self[key], or default if key is not a result key."""
+        return self[key] if key in _RESULT_KEYS else default
+
+    def keys(self) -> KeysView[str]:
+        return KeysView(self)
+
+    def items(self) -> ItemsView[str, Any]:
+        return ItemsView(self)
+
+    def values(self) -> ValuesView[Any]:
+        return ValuesView(self)
+
+
+# Registered rather than subclassed: mypyc-compiled classes cannot
+# inherit from the Mapping ABC.
+Mapping.register(SortResult)
 
 
 def sort_with_details(width, height, length, mass):
     """Sort a package and return a detailed result breakdown.
 
     If the inputs fail validation, the package is routed to
-    SPECIAL instead of raising an exception.
+    SPECIAL instead of raising an exception. The result is built
+    once from plain values, and dict-style reads such as
+    result["stack"] are single field lookups, so nothing is computed
+    per key. Callers that only need the stack should still use
+    sort(), which is memoized and builds no result object.
 
     Args:
         width: Package width in centimeters.
@@ -61,40 +410,25 @@ def sort_with_details(width, height, length, mass):
         mass: Package mass in kilograms.
 
     Returns:
-        A dict with keys:
-            stack: "STANDARD", "SPECIAL", or "REJECTED".
-            dimensions: {"width": ..., "height": ..., "length": ...}.
-            volume_cm3: float or None if inputs are invalid.
-            mass_kg: the mass value as given.
-            is_bulky: bool or None if inputs are invalid.
-            is_heavy: bool or None if inputs are invalid.
+        A SortResult. It is also a read-only Mapping with the keys
+        of the dict returned previously; use to_dict() for a plain
+        dict.
     """
     try:
-        stack = sort(width, height, length, mass)
+        stack, volume, bulky, heavy = _classify_core(
+            width, height, length, mass,
+        )
     except (ValueError, TypeError):
-        return {
-            "stack": "SPECIAL",
-            "dimensions": {
-                "width": width,
-                "height": height,
-                "length": length,
-            },
-            "volume_cm3": None,
-            "mass_kg": mass,
-            "is_bulky": None,
-            "is_heavy": None,
-        }
+        return SortResult(
+            "SPECIAL", Dimensions(width, height, length),
+            None, mass, None, None,
+        )
 
-    volume = width * height * length
-    return {
-        "stack": stack,
-        "dimensions": {
-            "width": float(width),
-            "height": float(height),
-            "length": float(length),
-        },
-        "volume_cm3": float(volume),
-        "mass_kg": float(mass),
-        "is_bulky": volume >= 1_000_000 or max(width, height, length) >= 150,
-        "is_heavy": mass >= 20,
-    }
+    return SortResult(
+        stack,
+        Dimensions(float(width), float(height), float(length)),
+        float(volume),
+        float(mass),
+        bulky,
+        heavy,
+    )
@@ -1,8 +1,21 @@
 """Tests for the package sorting function."""
 
+from collections.abc import Mapping
+from dataclasses import FrozenInstanceError
+from unittest.mock import patch
+
+import numpy as np
 import pytest
 
-from sort_packages import sort, sort_with_details
+from sort_packages import (
+    Dimensions,
+    SortResult,
+    _sort_cached,
+    sort,
+    sort_batch,
+    sort_fast,
+    sort_with_details,
+)
 
 
 class TestStandard:
@@ -116,6 +129,14 @@ class TestEdgeCases:
         with pytest.raises(ValueError, match="must be a number"):
             sort(10, float("nan"), 10, 5)
 
+    def test_numpy_float_accepted(self):
+        assert sort(np.float64(10), 10, 10, 5) == "STANDARD"
+        assert sort(10, 10, 10, np.float64(20)) == "SPECIAL"
+
+    def test_numpy_float_nan_raises(self):
+        with pytest.raises(ValueError, match="must be a number"):
+            sort(np.float64("nan"), 10, 10, 5)
+
     def test_inf_input_raises(self):
         with pytest.raises(ValueError, match="must be finite"):
             sort(10, 10, float("inf"), 5)
@@ -125,6 +146,52 @@ class TestEdgeCases:
             sort(10, 10, 10, float("-inf"))
 
 
+class TestSortCache:
+    """sort() memoizes results for repeated packages."""
+
+    def setup_method(self):
+        _sort_cached.cache_clear()
+
+    def test_repeat_call_hits_cache(self):
+        sort(10, 10, 10, 5)
+        assert sort(10, 10, 10, 5) == "STANDARD"
+        assert _sort_cached.cache_info().hits == 1
+
+    def test_bool_not_served_from_int_entry(self):
+        assert sort(1, 10, 10, 5) == "STANDARD"
+        with pytest.raises(ValueError, match="must be a number"):
+            sort(True, 10, 10, 5)
+
+    def test_unhashable_input_raises_value_error(self):
+        with pytest.raises(
+            ValueError, match="width must be a number, got list"
+        ):
+            sort([1], 10, 10, 5)
+
+    def test_errors_are_not_cached(self):
+        for _ in range(2):
+            with pytest.raises(ValueError, match="mass must be positive"):
+                sort(10, 10, 10, -1)
+        assert _sort_cached.cache_info().currsize == 0
+
+
+class TestSortFast:
+    """sort_fast() matches sort() on valid inputs."""
+
+    @pytest.mark.parametrize("package", [
+        (10, 10, 10, 5),
+        (149, 50, 50, 19.9),
+        (10, 10, 10, 20),
+        (100, 100, 100, 10),
+        (1, 1, 150, 1),
+        (150, 10, 10, 20),
+        (1000, 1000, 1, 25),
+        (99.5, 100.5, 100.5, 19.5),
+    ])
+    def test_matches_sort(self, package):
+        assert sort_fast(*package) == sort(*package)
+
+
 class TestSortWithDetails:
     """Tests for the sort_with_details function."""
 
@@ -133,10 +200,66 @@ class TestSortWithDetails:
         "mass_kg", "is_bulky", "is_heavy",
     }
 
+    def test_returns_sort_result(self):
+        result = sort_with_details(10, 10, 10, 5)
+        assert isinstance(result, SortResult)
+
     def test_returns_all_keys(self):
         result = sort_with_details(10, 10, 10, 5)
         assert set(result.keys()) == self._EXPECTED_KEYS
 
+    def test_unknown_key_raises_key_error(self):
+        with pytest.raises(KeyError):
+            sort_with_details(10, 10, 10, 5)["weight"]
+
+    def test_dict_conversion_matches_to_dict(self):
+        result = sort_with_details(10, 10, 10, 5)
+        assert dict(result) == result.to_dict()
+
+    def test_key_lookup_does_not_build_dict(self):
+        result = sort_with_details(10, 10, 10, 5)
+        with patch.object(
+            SortResult, "to_dict", side_effect=AssertionError,
+        ):
+            assert result["stack"] == "STANDARD"
+            assert result["is_heavy"] is False
+            assert result.get("mass_kg") == 5.0
+
+    def test_is_a_mapping(self):
+        result = sort_with_details(10, 10, 10, 5)
+        assert isinstance(result, Mapping)
+        assert len(result) == 6
+        assert list(result) == list(result.to_dict())
+
+    def test_contains(self):
+        result = sort_with_details(10, 10, 10, 5)
+        assert "stack" in result
+        assert "weight" not in result
+
+    def test_get_items_values(self):
+        result = sort_with_details(10, 10, 10, 5)
+        assert result.get("stack") == "STANDARD"
+        assert result.get("weight", "n/a") == "n/a"
+        assert dict(result.items()) == result.to_dict()
+        assert list(result.values()) == list(result.to_dict().values())
+
+    def test_to_dict_has_all_keys(self):
+        result = sort_with_details(10, 10, 10, 5).to_dict()
+        assert set(result.keys()) == self._EXPECTED_KEYS
+
+    def test_to_dict_nests_dimensions(self):
+        result = sort_with_details(10, 20, 30, 5).to_dict()
+        assert result["dimensions"] == {
+            "width": 10.0,
+            "height": 20.0,
+            "length": 30.0,
+        }
+
+    def test_result_is_immutable(self):
+        result = sort_with_details(10, 10, 10, 5)
+        with pytest.raises(FrozenInstanceError):
+            result.stack = "REJECTED"
+
     def test_standard_flags(self):
         result = sort_with_details(10, 10, 10, 5)
         assert result["stack"] == "STANDARD"
@@ -195,3 +318,122 @@ class TestSortWithDetails:
     def test_string_input_routes_to_special(self):
         result = sort_with_details("big", 10, 10, 5)
         assert result["stack"] == "SPECIAL"
+
+    def test_attribute_access(self):
+        result = sort_with_details(100, 100, 100, 20)
+        assert result.stack == "REJECTED"
+        assert result.is_bulky is True
+        assert result.is_heavy is True
+        assert result.volume_cm3 == 1_000_000.0
+        assert result.mass_kg == 20.0
+
+    def test_dimensions_attribute(self):
+        result = sort_with_details(10, 20, 30, 5)
+        assert result.dimensions == Dimensions(10.0, 20.0, 30.0)
+
+    def test_invalid_input_attributes(self):
+        result = sort_with_details(10, 10, 10, -1)
+        assert result.stack == "SPECIAL"
+        assert result.volume_cm3 is None
+        assert result.is_bulky is None
+        assert result.is_heavy is None
+
+    def test_numpy_float_input_sorted_normally(self):
+        result = sort_with_details(np.float64(100), 100, 100, 10)
+        assert result.stack == "SPECIAL"
+        assert result.is_bulky is True
+        assert result.volume_cm3 == 1_000_000.0
+
+    def test_invalid_input_keeps_raw_values(self):
+        result = sort_with_details("big", 10, 10, 5)
+        assert result.dimensions == Dimensions("big", 10, 10)
+        assert result.mass_kg == 5
+
+
+class TestSortBatch:
+    """Tests for the vectorized sort_batch function."""
+
+    def test_matches_scalar_sort(self):
+        packages = [
+            (10, 10, 10, 5),
+            (10, 10, 10, 20),
+            (100, 100, 100, 10),
+            (150, 1, 1, 1),
+            (1, 150, 1, 1),
+            (1, 1, 150, 1),
+            (99, 100, 100, 19),
+            (100, 100, 100, 20),
+            (1000, 1000, 1, 25),
+        ]
+        widths, heights, lengths, masses = zip(*packages)
+        result = sort_batch(
+            np.array(widths), np.array(heights),
+            np.array(lengths), np.array(masses),
+        )
+        assert list(result) == [sort(*p) for p in packages]
+
+    def test_accepts_lists(self):
+        result = sort_batch([10, 150], [10, 10], [10, 10], [5, 20])
+        assert list(result) == ["STANDARD", "REJECTED"]
+
+    def test_empty_batch(self):
+        result = sort_batch([], [], [], [])
+        assert result.shape == (0,)
+
+    def test_preserves_shape(self):
+        ones = np.ones((2, 3))
+        result = sort_batch(ones, ones, ones, ones * 25)
+        assert result.shape == (2, 3)
+        assert (result == "SPECIAL").all()
+
+    def test_shape_mismatch_raises(self):
+        with pytest.raises(ValueError, match="same shape"):
+            sort_batch([1, 2], [1, 2], [1, 2], [1])
+
+    def test_negative_value_raises(self):
+        with pytest.raises(ValueError, match="length must be positive"):
+            sort_batch([10, 10], [10, 10], [10, -1], [5, 5])
+
+    def test_nan_value_raises(self):
+        with pytest.raises(ValueError, match="mass must be a number"):
+            sort_batch([10], [10], [10], [float("nan")])
+
+    def test_inf_value_raises(self):
+        with pytest.raises(ValueError, match="width must be finite"):
+            sort_batch([float("inf")], [10], [10], [5])
+
+    def test_string_value_raises(self):
+        with pytest.raises(
+            ValueError, match="width must be a number, got str"
+        ):
+            sort_batch(["10"], [10], [10], [5])
+
+    def test_non_numeric_string_raises_sort_error(self):
+        with pytest.raises(ValueError, match="height must be a number"):
+            sort_batch([10], ["abc"], [10], [5])
+
+    def test_bool_value_raises(self):
+        with pytest.raises(
+            ValueError, match="width must be a number, got bool"
+        ):
+            sort_batch([True], [10], [10], [5])
+
+    def test_object_array_of_numbers_accepted(self):
+        widths = np.array([10, 150.0], dtype=object)
+        result = sort_batch(widths, [10, 10], [10, 10], [5, 20])
+        assert list(result) == ["STANDARD", "REJECTED"]
+
+    def test_object_array_keeps_shape_and_dtype(self):
+        widths = np.array([[10, 150.0], [10, 10]], dtype=object)
+        ones = np.full((2, 2), 10)
+        result = sort_batch(widths, ones, ones, [[5, 20], [25, 5]])
+        assert result.shape == (2, 2)
+        assert result.dtype == sort_batch([1], [1], [1], [1]).dtype
+        assert result.tolist() == [
+            ["STANDARD", "REJECTED"], ["SPECIAL", "STANDARD"],
+        ]
+
+    def test_empty_object_array(self):
+        empty = np.array([], dtype=object)
+        result = sort_batch(empty, empty, empty, empty)
+        assert result.shape == (0,)
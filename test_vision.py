@@ -1,13 +1,23 @@
 """Tests for the Gemini vision-based dimension estimation."""
 
+import asyncio
 import os
-from unittest.mock import MagicMock, patch
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, PropertyMock, patch
 
 import pytest
 
+import vision
 from vision import (
     _parse_dimensions,
+    _parse_dimensions_list,
     estimate_dimensions,
+    estimate_dimensions_async,
+    estimate_dimensions_batch,
+    sort_many,
+    sort_many_async,
     sort_with_fallback,
 )
 
@@ -23,44 +33,32 @@ class TestParseDimensions:
     def test_valid_json(self):
         text = '{"width": 30, "height": 20, "length": 40}'
         result = _parse_dimensions(text)
-        assert result == {
-            "width": 30.0,
-            "height": 20.0,
-            "length": 40.0,
-        }
+        assert result == (30.0, 20.0, 40.0)
 
     def test_valid_json_with_code_fences(self):
         text = '```json\n{"width": 30, "height": 20, "length": 40}\n```'
         result = _parse_dimensions(text)
-        assert result == {
-            "width": 30.0,
-            "height": 20.0,
-            "length": 40.0,
-        }
+        assert result == (30.0, 20.0, 40.0)
 
     def test_valid_json_with_bare_code_fences(self):
         text = '```\n{"width": 10, "height": 10, "length": 10}\n```'
         result = _parse_dimensions(text)
-        assert result == {
-            "width": 10.0,
-            "height": 10.0,
-            "length": 10.0,
-        }
+        assert result == (10.0, 10.0, 10.0)
+
+    def test_trailing_code_fence_only(self):
+        text = '{"width": 10, "height": 10, "length": 10}\n```'
+        assert _parse_dimensions(text) == (10.0, 10.0, 10.0)
 
     def test_float_values(self):
         text = '{"width": 30.5, "height": 20.3, "length": 40.1}'
         result = _parse_dimensions(text)
-        assert result == {
-            "width": 30.5,
-            "height": 20.3,
-            "length": 40.1,
-        }
+        assert result == (30.5, 20.3, 40.1)
 
     def test_integers_converted_to_float(self):
         result = _parse_dimensions(
             '{"width": 1, "height": 2, "length": 3}'
         )
-        for value in result.values():
+        for value in result:
             assert isinstance(value, float)
 
     def test_extra_keys_ignored(self):
@@ -68,9 +66,7 @@ class TestParseDimensions:
             '{"width": 10, "height": 20, '
             '"length": 30, "confidence": 0.9}'
         )
-        result = _parse_dimensions(text)
-        assert "confidence" not in result
-        assert result["width"] == 10.0
+        assert _parse_dimensions(text) == (10.0, 20.0, 30.0)
 
     def test_error_response_raises(self):
         text = '{"error": "no package detected"}'
@@ -137,6 +133,14 @@ class TestParseDimensions:
         with pytest.raises(ValueError, match="must be a number"):
             _parse_dimensions(text)
 
+    def test_empty_error_ignored(self):
+        text = '{"width": 30, "height": 20, "length": 40, "error": ""}'
+        assert _parse_dimensions(text) == (30.0, 20.0, 40.0)
+
+    def test_null_error_ignored(self):
+        text = '{"width": 30, "height": 20, "length": 40, "error": null}'
+        assert _parse_dimensions(text) == (30.0, 20.0, 40.0)
+
     def test_invalid_json_raises(self):
         with pytest.raises(
             ValueError, match="Could not parse"
@@ -147,31 +151,90 @@ class TestParseDimensions:
         with pytest.raises(ValueError):
             _parse_dimensions("")
 
+    def test_non_object_json_raises(self):
+        with pytest.raises(
+            ValueError, match="not a JSON object"
+        ):
+            _parse_dimensions("[30, 20, 40]")
+
+
+class TestParseDimensionsList:
+    """Tests for the _parse_dimensions_list helper."""
+
+    def test_valid_array(self):
+        text = (
+            '[{"width": 1, "height": 2, "length": 3}, '
+            '{"width": 4, "height": 5, "length": 6}]'
+        )
+        assert _parse_dimensions_list(text, 2) == [
+            (1.0, 2.0, 3.0),
+            (4.0, 5.0, 6.0),
+        ]
+
+    def test_error_entry_is_returned_not_raised(self):
+        text = (
+            '[{"error": "image too dark"}, '
+            '{"width": 4, "height": 5, "length": 6}]'
+        )
+        first, second = _parse_dimensions_list(text, 2)
+        assert isinstance(first, ValueError)
+        assert "too dark" in str(first)
+        assert second == (4.0, 5.0, 6.0)
+
+    def test_non_object_entry_is_returned_not_raised(self):
+        (result,) = _parse_dimensions_list("[5]", 1)
+        assert isinstance(result, ValueError)
+
+    def test_code_fences_stripped(self):
+        text = '```json\n[{"width": 1, "height": 2, "length": 3}]\n```'
+        assert _parse_dimensions_list(text, 1) == [(1.0, 2.0, 3.0)]
+
+    def test_wrong_length_raises(self):
+        text = '[{"width": 1, "height": 2, "length": 3}]'
+        with pytest.raises(ValueError, match="array of 2"):
+            _parse_dimensions_list(text, 2)
+
+    def test_object_instead_of_array_raises(self):
+        text = '{"width": 1, "height": 2, "length": 3}'
+        with pytest.raises(ValueError, match="array of 1"):
+            _parse_dimensions_list(text, 1)
+
+    def test_invalid_json_raises(self):
+        with pytest.raises(ValueError, match="Could not parse"):
+            _parse_dimensions_list("nope", 1)
+
 
 # -------------------------------------------------------------------
 # Fixtures for mocked Gemini API tests
 # -------------------------------------------------------------------
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Start every test without cached dimensions, key or client."""
+    vision._DIM_CACHE.clear()
+    vision._reset_client()
+    yield
+    vision._DIM_CACHE.clear()
+    vision._reset_client()
+
+
 @pytest.fixture()
 def dummy_image_path(tmp_path):
     """Create a temporary dummy JPEG file."""
     path = tmp_path / "test_box.jpg"
-    # Minimal bytes so the file exists; PIL is mocked.
+    # Minimal bytes so the file exists; Gemini is mocked.
     path.write_bytes(b"\xff\xd8\xff\xe0")
     return str(path)
 
 
 @pytest.fixture()
 def mock_gemini():
-    """Mock the Gemini client and PIL.Image.open."""
+    """Mock the Gemini client."""
     mock_client = MagicMock()
-    mock_image = MagicMock()
 
-    with patch("vision._get_client", return_value=mock_client), \
-         patch("vision.Image") as mock_pil:
-        mock_pil.open.return_value = mock_image
-        yield mock_client, mock_image
+    with patch("vision._get_client", return_value=mock_client):
+        yield mock_client
 
 
 def _make_response(text):
@@ -192,7 +255,7 @@ class TestEstimateDimensions:
     def test_successful_estimation(
         self, dummy_image_path, mock_gemini
     ):
-        mock_client, _ = mock_gemini
+        mock_client = mock_gemini
         mock_client.models.generate_content.return_value = (
             _make_response(
                 '{"width": 45, "height": 30, "length": 60}'
@@ -221,9 +284,17 @@ class TestEstimateDimensions:
         ):
             estimate_dimensions(str(txt_file))
 
+    def test_unsupported_format_lists_extensions(self, tmp_path):
+        txt_file = tmp_path / "notes.txt"
+        txt_file.write_text("hello")
+        with pytest.raises(
+            ValueError,
+            match=r"Supported: \.bmp, \.gif, \.jpeg, \.jpg, \.png, \.webp$",
+        ):
+            estimate_dimensions(str(txt_file))
+
     def test_api_key_missing_raises(self, dummy_image_path):
-        with patch("vision._get_api_key") as mock_get_key, \
-             patch("vision.Image"):
+        with patch("vision._get_api_key") as mock_get_key:
             mock_get_key.side_effect = EnvironmentError(
                 "GOOGLE_API_KEY not found"
             )
@@ -235,7 +306,7 @@ class TestEstimateDimensions:
     def test_api_error_response_raises(
         self, dummy_image_path, mock_gemini
     ):
-        mock_client, _ = mock_gemini
+        mock_client = mock_gemini
         mock_client.models.generate_content.return_value = (
             _make_response('{"error": "no package detected"}')
         )
@@ -248,7 +319,7 @@ class TestEstimateDimensions:
     def test_api_garbage_response_raises(
         self, dummy_image_path, mock_gemini
     ):
-        mock_client, _ = mock_gemini
+        mock_client = mock_gemini
         mock_client.models.generate_content.return_value = (
             _make_response("I cannot process this image")
         )
@@ -261,7 +332,7 @@ class TestEstimateDimensions:
     def test_model_name_passed(
         self, dummy_image_path, mock_gemini
     ):
-        mock_client, _ = mock_gemini
+        mock_client = mock_gemini
         mock_client.models.generate_content.return_value = (
             _make_response(
                 '{"width": 10, "height": 10, "length": 10}'
@@ -275,8 +346,111 @@ class TestEstimateDimensions:
         )
         assert call_kwargs.kwargs["model"] == "gemini-2.5-flash"
 
+    def test_raw_bytes_sent_with_mime_type(
+        self, tmp_path, mock_gemini
+    ):
+        mock_client = mock_gemini
+        mock_client.models.generate_content.return_value = (
+            _make_response(
+                '{"width": 10, "height": 10, "length": 10}'
+            )
+        )
+        path = tmp_path / "box.PNG"
+        path.write_bytes(b"\x89PNG raw bytes")
+
+        estimate_dimensions(str(path))
+
+        contents = (
+            mock_client.models.generate_content.call_args.kwargs["contents"]
+        )
+        blob = contents[0].inline_data
+        assert blob.data == b"\x89PNG raw bytes"
+        assert blob.mime_type == "image/png"
+
+    def test_response_schema_requested(
+        self, dummy_image_path, mock_gemini
+    ):
+        mock_client = mock_gemini
+        mock_client.models.generate_content.return_value = (
+            _make_response(
+                '{"width": 10, "height": 10, "length": 10}'
+            )
+        )
+
+        estimate_dimensions(dummy_image_path)
+
+        config = (
+            mock_client.models.generate_content.call_args.kwargs["config"]
+        )
+        assert set(config.response_schema["properties"]) == {
+            "width", "height", "length", "error",
+        }
+        assert config.response_schema["propertyOrdering"] == [
+            "width", "height", "length", "error",
+        ]
+
+    def test_config_reused_across_calls(self, tmp_path, mock_gemini):
+        mock_client = mock_gemini
+        mock_client.models.generate_content.return_value = (
+            _make_response(
+                '{"width": 10, "height": 10, "length": 10}'
+            )
+        )
+        for path in _write_images(tmp_path, 2):
+            estimate_dimensions(path)
+
+        first, second = (
+            c.kwargs["config"]
+            for c in mock_client.models.generate_content.call_args_list
+        )
+        assert first is second
+
+    def test_uses_parsed_response(self, dummy_image_path, mock_gemini):
+        mock_client = mock_gemini
+        response = _make_response("not json")
+        response.parsed = {"width": 1, "height": 2, "length": 3}
+        mock_client.models.generate_content.return_value = response
+
+        result = estimate_dimensions(dummy_image_path)
+        assert result == {"width": 1.0, "height": 2.0, "length": 3.0}
+
+    def test_parsed_error_raises(self, dummy_image_path, mock_gemini):
+        mock_client = mock_gemini
+        response = _make_response('{"error": "image too dark"}')
+        response.parsed = {"error": "image too dark"}
+        mock_client.models.generate_content.return_value = response
+
+        with pytest.raises(ValueError, match="image too dark"):
+            estimate_dimensions(dummy_image_path)
+
+    def test_parsed_response_skips_text(
+        self, dummy_image_path, mock_gemini
+    ):
+        mock_client = mock_gemini
+        response = MagicMock()
+        text = PropertyMock(return_value="not json")
+        type(response).text = text
+        response.parsed = {"width": 1, "height": 2, "length": 3}
+        mock_client.models.generate_content.return_value = response
+
+        estimate_dimensions(dummy_image_path)
+        text.assert_not_called()
+
+    def test_falls_back_to_text_without_parsed(
+        self, dummy_image_path, mock_gemini
+    ):
+        mock_client = mock_gemini
+        response = _make_response(
+            '{"width": 4, "height": 5, "length": 6}'
+        )
+        response.parsed = None
+        mock_client.models.generate_content.return_value = response
+
+        result = estimate_dimensions(dummy_image_path)
+        assert result == {"width": 4.0, "height": 5.0, "length": 6.0}
+
     def test_supported_extensions(self, tmp_path, mock_gemini):
-        mock_client, _ = mock_gemini
+        mock_client = mock_gemini
         mock_client.models.generate_content.return_value = (
             _make_response(
                 '{"width": 10, "height": 10, "length": 10}'
@@ -290,6 +464,647 @@ class TestEstimateDimensions:
             assert "width" in result
 
 
+# -------------------------------------------------------------------
+# TestEstimateDimensionsBatch — several images per Gemini request
+# -------------------------------------------------------------------
+
+
+def _write_images(tmp_path, count):
+    """Write count distinct dummy images and return their paths."""
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"box{i}.jpg"
+        path.write_bytes(bytes([i]))
+        paths.append(str(path))
+    return paths
+
+
+class TestEstimateDimensionsBatch:
+    """Tests for estimate_dimensions_batch with mocked Gemini API."""
+
+    def test_api_error_returned_per_image(self, tmp_path, mock_gemini):
+        from google.genai import errors
+
+        mock_client = mock_gemini
+        mock_client.models.generate_content.side_effect = (
+            errors.ClientError(429, {"error": {"message": "quota"}})
+        )
+
+        results = estimate_dimensions_batch(_write_images(tmp_path, 2))
+
+        assert all(isinstance(r, errors.APIError) for r in results)
+
+    def test_uses_parsed_response(self, tmp_path, mock_gemini):
+        mock_client = mock_gemini
+        response = _make_response("not json")
+        response.parsed = [
+            {"width": 1, "height": 2, "length": 3},
+            {"error": "no package detected"},
+        ]
+        mock_client.models.generate_content.return_value = response
+
+        results = estimate_dimensions_batch(_write_images(tmp_path, 2))
+
+        assert results[0] == {"width": 1.0, "height": 2.0, "length": 3.0}
+        assert isinstance(results[1], ValueError)
+        config = (
+            mock_client.models.generate_content.call_args.kwargs["config"]
+        )
+        assert config.response_schema["type"] == "ARRAY"
+
+    def test_single_request_for_all_images(self, tmp_path, mock_gemini):
+        mock_client = mock_gemini
+        mock_client.models.generate_content.return_value = (
+            _make_response(
+                '[{"width": 1, "height": 1, "length": 1}, '
+                '{"width": 2, "height": 2, "length": 2}, '
+                '{"width": 3, "height": 3, "length": 3}]'
+            )
+        )
+
+        results = estimate_dimensions_batch(_write_images(tmp_path, 3))
+
+        assert mock_client.models.generate_content.call_count == 1
+        contents = (
+            mock_client.models.generate_content.call_args.kwargs["contents"]
+        )
+        assert len(contents) == 4
+        assert contents[-1] == vision._BATCH_PROMPT
+        assert [r["width"] for r in results] == [1.0, 2.0, 3.0]
+
+    def test_bad_entry_does_not_fail_batch(self, tmp_path, mock_gemini):
+        mock_client = mock_gemini
+        mock_client.models.generate_content.return_value = (
+            _make_response(
+                '[{"error": "image too blurry"}, '
+                '{"width": 2, "height": 2, "length": 2}]'
+            )
+        )
+
+        first, second = estimate_dimensions_batch(
+            _write_images(tmp_path, 2)
+        )
+
+        assert isinstance(first, ValueError)
+        assert second["width"] == 2.0
+
+    def test_missing_file_not_sent(self, tmp_path, mock_gemini):
+        mock_client = mock_gemini
+        mock_client.models.generate_content.return_value = (
+            _make_response('[{"width": 1, "height": 1, "length": 1}]')
+        )
+        (path,) = _write_images(tmp_path, 1)
+
+        missing, found = estimate_dimensions_batch(
+            ["/no/such/file.jpg", path]
+        )
+
+        assert isinstance(missing, FileNotFoundError)
+        assert found["width"] == 1.0
+        contents = (
+            mock_client.models.generate_content.call_args.kwargs["contents"]
+        )
+        assert len(contents) == 2
+
+    def test_cached_images_not_sent(self, tmp_path, mock_gemini):
+        mock_client = mock_gemini
+        first, second = _write_images(tmp_path, 2)
+        mock_client.models.generate_content.return_value = (
+            _make_response('{"width": 1, "height": 1, "length": 1}')
+        )
+        estimate_dimensions(first)
+        mock_client.models.generate_content.return_value = (
+            _make_response('[{"width": 2, "height": 2, "length": 2}]')
+        )
+
+        results = estimate_dimensions_batch([first, second])
+
+        assert [r["width"] for r in results] == [1.0, 2.0]
+        assert mock_client.models.generate_content.call_count == 2
+
+    def test_no_request_when_nothing_pending(self, mock_gemini):
+        mock_client = mock_gemini
+
+        (result,) = estimate_dimensions_batch(["/no/such/file.jpg"])
+
+        assert isinstance(result, FileNotFoundError)
+        mock_client.models.generate_content.assert_not_called()
+
+    def test_malformed_response_fails_each_pending_image(
+        self, tmp_path, mock_gemini
+    ):
+        mock_client = mock_gemini
+        mock_client.models.generate_content.return_value = (
+            _make_response('[{"width": 1, "height": 1, "length": 1}]')
+        )
+
+        results = estimate_dimensions_batch(_write_images(tmp_path, 2))
+
+        assert all(isinstance(r, ValueError) for r in results)
+
+
+# -------------------------------------------------------------------
+# TestEstimateDimensionsAsync — aio client
+# -------------------------------------------------------------------
+
+
+class TestEstimateDimensionsAsync:
+    """Tests for estimate_dimensions_async with mocked Gemini API."""
+
+    def test_successful_estimation(self, dummy_image_path, mock_gemini):
+        mock_client = mock_gemini
+        mock_client.aio.models.generate_content = AsyncMock(
+            return_value=_make_response(
+                '{"width": 45, "height": 30, "length": 60}'
+            )
+        )
+
+        result = asyncio.run(estimate_dimensions_async(dummy_image_path))
+
+        assert result == {"width": 45.0, "height": 30.0, "length": 60.0}
+        call_kwargs = mock_client.aio.models.generate_content.call_args
+        assert call_kwargs.kwargs["model"] == "gemini-2.5-flash"
+
+    def test_shares_cache_with_sync_variant(
+        self, dummy_image_path, mock_gemini
+    ):
+        mock_client = mock_gemini
+        mock_client.models.generate_content.return_value = (
+            _make_response('{"width": 1, "height": 2, "length": 3}')
+        )
+        mock_client.aio.models.generate_content = AsyncMock()
+
+        estimate_dimensions(dummy_image_path)
+        result = asyncio.run(estimate_dimensions_async(dummy_image_path))
+
+        assert result["length"] == 3.0
+        mock_client.aio.models.generate_content.assert_not_called()
+
+    def test_file_not_found_raises(self):
+        with pytest.raises(FileNotFoundError, match="not found"):
+            asyncio.run(estimate_dimensions_async("/no/such/file.jpg"))
+
+    def test_client_created_off_event_loop(self, dummy_image_path):
+        import threading
+
+        mock_client = MagicMock()
+        mock_client.aio.models.generate_content = AsyncMock(
+            return_value=_make_response(
+                '{"width": 1, "height": 2, "length": 3}'
+            )
+        )
+        client_threads = []
+
+        def get_client():
+            client_threads.append(threading.current_thread())
+            return mock_client
+
+        with patch("vision._get_client", side_effect=get_client):
+            asyncio.run(estimate_dimensions_async(dummy_image_path))
+
+        assert client_threads
+        assert threading.main_thread() not in client_threads
+
+
+# -------------------------------------------------------------------
+# TestEnvSettings — integer settings read from the environment
+# -------------------------------------------------------------------
+
+
+class TestEnvSettings:
+    """Tests for _env_int and the settings read at import time."""
+
+    def test_unset_uses_default(self, monkeypatch):
+        monkeypatch.delenv("VISION_TEST_SETTING", raising=False)
+        assert vision._env_int("VISION_TEST_SETTING", 7) == 7
+
+    def test_valid_value_parsed(self, monkeypatch):
+        monkeypatch.setenv("VISION_TEST_SETTING", "0")
+        assert vision._env_int("VISION_TEST_SETTING", 7) == 0
+
+    @pytest.mark.parametrize("raw", ["1k", "", "-1"])
+    def test_invalid_value_uses_default(self, monkeypatch, caplog, raw):
+        monkeypatch.setenv("VISION_TEST_SETTING", raw)
+        assert vision._env_int("VISION_TEST_SETTING", 7) == 7
+        assert "VISION_TEST_SETTING" in caplog.text
+
+    def test_malformed_setting_does_not_break_import(self):
+        env = dict(os.environ, VISION_CACHE_SIZE="1k", VISION_MAX_DIM="-5")
+        code = (
+            "import vision; "
+            "assert vision._DIM_CACHE_SIZE == 1024; "
+            "assert vision._MAX_DIM == 1024"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=env,
+        )
+        assert result.returncode == 0
+
+
+# -------------------------------------------------------------------
+# TestClientCache — API key and Gemini client reuse
+# -------------------------------------------------------------------
+
+
+class TestClientCache:
+    """Tests for the cached API key and Gemini client."""
+
+    def test_import_skips_heavy_dependencies(self):
+        code = (
+            "import sys, vision; "
+            "heavy = {'google.genai', 'PIL.Image', 'asyncio'}; "
+            "sys.exit(len(heavy & set(sys.modules)))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        assert result.returncode == 0
+
+    def test_client_created_once(self):
+        with patch("vision._get_api_key", return_value="key"), \
+             patch("google.genai.Client") as mock_client_cls:
+            first = vision._get_client()
+            second = vision._get_client()
+
+        assert first is second
+        mock_client_cls.assert_called_once()
+        assert mock_client_cls.call_args.kwargs["api_key"] == "key"
+
+    def test_client_uses_pooled_transport(self):
+        with patch("vision._get_api_key", return_value="key"), \
+             patch("google.genai.Client") as mock_client_cls:
+            vision._get_client()
+
+        options = mock_client_cls.call_args.kwargs["http_options"]
+        for args in (options.client_args, options.async_client_args):
+            assert args["limits"].max_keepalive_connections == 32
+            assert args["limits"].max_connections == 64
+
+    def test_http2_only_when_h2_installed(self):
+        with patch("importlib.util.find_spec", return_value=None):
+            options = vision._http_options()
+        assert options.client_args["http2"] is False
+
+    def test_real_client_accepts_http_options(self):
+        with patch("vision._get_api_key", return_value="key"):
+            client = vision._get_client()
+        assert client.models is not None
+
+    def test_reset_client_creates_new_client(self):
+        with patch("vision._get_api_key", return_value="key"), \
+             patch("google.genai.Client") as mock_client_cls:
+            vision._get_client()
+            vision._reset_client()
+            vision._get_client()
+
+        assert mock_client_cls.call_count == 2
+
+    def test_api_key_resolved_once(self):
+        with patch(
+            "dotenv.dotenv_values",
+            return_value={"GOOGLE_API_KEY": "from-dotenv"},
+        ) as mock_dotenv:
+            assert vision._get_api_key() == "from-dotenv"
+            assert vision._get_api_key() == "from-dotenv"
+
+        mock_dotenv.assert_called_once()
+
+    def test_missing_key_is_not_cached(self):
+        with patch("dotenv.dotenv_values", return_value={}), \
+             patch.dict(os.environ, {}, clear=True), \
+             patch("boto3.client", side_effect=Exception("no aws")):
+            with pytest.raises(EnvironmentError):
+                vision._get_api_key()
+
+        with patch(
+            "dotenv.dotenv_values",
+            return_value={"GOOGLE_API_KEY": "late"},
+        ):
+            assert vision._get_api_key() == "late"
+
+
+# -------------------------------------------------------------------
+# TestPrepareImage — uploads are in a Gemini format and downscaled
+# -------------------------------------------------------------------
+
+
+def _image_bytes(size, mode="RGB", fmt="PNG"):
+    """Encode a blank image of the given (width, height)."""
+    import io
+
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new(mode, size).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def _image_format(data):
+    """Return the Pillow format name of encoded image bytes."""
+    import io
+
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        return image.format
+
+
+class TestPrepareImage:
+    """Tests for the _prepare_image upload step."""
+
+    @pytest.fixture(autouse=True)
+    def small_max_dim(self, monkeypatch):
+        monkeypatch.setattr(vision, "_MAX_DIM", 64)
+
+    def test_oversized_image_downscaled_to_jpeg(self):
+        import io
+
+        from PIL import Image
+
+        data, mime_type = vision._prepare_image(
+            _image_bytes((200, 100), "RGBA"), "image/png"
+        )
+        assert mime_type == "image/jpeg"
+        with Image.open(io.BytesIO(data)) as image:
+            assert image.format == "JPEG"
+            assert image.size == (64, 32)
+
+    def test_downscaled_image_follows_exif_orientation(self):
+        import io
+
+        from PIL import Image
+
+        image = Image.new("RGB", (200, 100))
+        exif = image.getexif()
+        exif[0x0112] = 6  # Orientation: rotate 90 degrees clockwise.
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", exif=exif)
+
+        data, _ = vision._prepare_image(buffer.getvalue(), "image/jpeg")
+        with Image.open(io.BytesIO(data)) as result:
+            assert result.size == (32, 64)
+            assert result.getexif().get(0x0112) is None
+
+    def test_small_image_unchanged(self):
+        original = _image_bytes((64, 10))
+        data, mime_type = vision._prepare_image(original, "image/png")
+        assert data is original
+        assert mime_type == "image/png"
+
+    def test_mime_type_from_content_not_suffix(self):
+        original = _image_bytes((10, 10))
+        data, mime_type = vision._prepare_image(original, "image/jpeg")
+        assert data is original
+        assert mime_type == "image/png"
+
+    @pytest.mark.parametrize(
+        "fmt, mime", [("BMP", "image/bmp"), ("GIF", "image/gif")],
+    )
+    def test_unsupported_format_reencoded_as_png(self, fmt, mime):
+        data, mime_type = vision._prepare_image(
+            _image_bytes((10, 10), fmt=fmt), mime
+        )
+        assert mime_type == "image/png"
+        assert _image_format(data) == "PNG"
+
+    def test_unreadable_image_unchanged(self):
+        data, mime_type = vision._prepare_image(b"not an image", "image/bmp")
+        assert data == b"not an image"
+        assert mime_type == "image/bmp"
+
+    def test_zero_max_dim_disables_resize(self, monkeypatch):
+        monkeypatch.setattr(vision, "_MAX_DIM", 0)
+        original = _image_bytes((200, 100))
+        assert vision._prepare_image(original, "image/png") == (
+            original, "image/png",
+        )
+
+    def test_zero_max_dim_still_reencodes_bmp(self, monkeypatch):
+        monkeypatch.setattr(vision, "_MAX_DIM", 0)
+        _, mime_type = vision._prepare_image(
+            _image_bytes((200, 100), fmt="BMP"), "image/bmp"
+        )
+        assert mime_type == "image/png"
+
+    def test_decompression_bomb_raises_value_error(self, monkeypatch):
+        from PIL import Image
+
+        monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 100)
+        with pytest.raises(ValueError, match="too large"):
+            vision._prepare_image(_image_bytes((300, 300)), "image/png")
+
+    def test_decompression_bomb_routes_to_special(
+        self, tmp_path, monkeypatch, mock_gemini
+    ):
+        from PIL import Image
+
+        monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 100)
+        path = tmp_path / "huge.png"
+        path.write_bytes(_image_bytes((300, 300)))
+
+        result = sort_with_fallback(mass=5.0, image_path=str(path))
+
+        assert result["stack"] == "SPECIAL"
+        assert result["source"] == "error"
+        mock_gemini.models.generate_content.assert_not_called()
+
+    def test_decompression_bomb_fails_only_its_batch_slot(
+        self, tmp_path, monkeypatch, mock_gemini
+    ):
+        from PIL import Image
+
+        mock_client = mock_gemini
+        mock_client.models.generate_content.return_value = (
+            _make_response('[{"width": 1, "height": 2, "length": 3}]')
+        )
+        monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 100)
+        huge = tmp_path / "huge.png"
+        huge.write_bytes(_image_bytes((300, 300)))
+        small = tmp_path / "small.png"
+        small.write_bytes(_image_bytes((5, 5)))
+
+        results = estimate_dimensions_batch([str(huge), str(small)])
+
+        assert isinstance(results[0], ValueError)
+        assert results[1] == {"width": 1.0, "height": 2.0, "length": 3.0}
+
+    def test_small_bmp_sent_as_png(self, tmp_path, mock_gemini):
+        mock_client = mock_gemini
+        mock_client.models.generate_content.return_value = (
+            _make_response(
+                '{"width": 10, "height": 10, "length": 10}'
+            )
+        )
+        path = tmp_path / "box.bmp"
+        path.write_bytes(_image_bytes((20, 20), fmt="BMP"))
+
+        estimate_dimensions(str(path))
+
+        contents = (
+            mock_client.models.generate_content.call_args.kwargs["contents"]
+        )
+        assert contents[0].inline_data.mime_type == "image/png"
+        assert _image_format(contents[0].inline_data.data) == "PNG"
+
+    def test_estimate_dimensions_sends_resized_image(
+        self, tmp_path, mock_gemini
+    ):
+        mock_client = mock_gemini
+        mock_client.models.generate_content.return_value = (
+            _make_response(
+                '{"width": 10, "height": 10, "length": 10}'
+            )
+        )
+        path = tmp_path / "box.png"
+        path.write_bytes(_image_bytes((300, 300)))
+
+        estimate_dimensions(str(path))
+
+        contents = (
+            mock_client.models.generate_content.call_args.kwargs["contents"]
+        )
+        assert contents[0].inline_data.mime_type == "image/jpeg"
+
+
+# -------------------------------------------------------------------
+# TestDimensionCache — content-hash cache around the Gemini call
+# -------------------------------------------------------------------
+
+
+class TestDimensionCache:
+    """Tests for the image-content cache in estimate_dimensions."""
+
+    def test_same_image_calls_gemini_once(
+        self, dummy_image_path, mock_gemini
+    ):
+        mock_client = mock_gemini
+        mock_client.models.generate_content.return_value = (
+            _make_response(
+                '{"width": 45, "height": 30, "length": 60}'
+            )
+        )
+
+        first = estimate_dimensions(dummy_image_path)
+        second = estimate_dimensions(dummy_image_path)
+
+        assert first == second
+        assert mock_client.models.generate_content.call_count == 1
+
+    def test_same_content_different_path_hits_cache(
+        self, tmp_path, mock_gemini
+    ):
+        mock_client = mock_gemini
+        mock_client.models.generate_content.return_value = (
+            _make_response(
+                '{"width": 10, "height": 10, "length": 10}'
+            )
+        )
+        for name in ("a.jpg", "b.png"):
+            (tmp_path / name).write_bytes(b"same bytes")
+            estimate_dimensions(str(tmp_path / name))
+
+        assert mock_client.models.generate_content.call_count == 1
+
+    def test_different_content_calls_gemini_again(
+        self, tmp_path, mock_gemini
+    ):
+        mock_client = mock_gemini
+        mock_client.models.generate_content.return_value = (
+            _make_response(
+                '{"width": 10, "height": 10, "length": 10}'
+            )
+        )
+        for i in range(2):
+            path = tmp_path / f"box{i}.jpg"
+            path.write_bytes(bytes([i]))
+            estimate_dimensions(str(path))
+
+        assert mock_client.models.generate_content.call_count == 2
+
+    def test_errors_are_not_cached(
+        self, dummy_image_path, mock_gemini
+    ):
+        mock_client = mock_gemini
+        mock_client.models.generate_content.side_effect = [
+            _make_response('{"error": "image too blurry"}'),
+            _make_response(
+                '{"width": 10, "height": 10, "length": 10}'
+            ),
+        ]
+
+        with pytest.raises(ValueError, match="blurry"):
+            estimate_dimensions(dummy_image_path)
+        result = estimate_dimensions(dummy_image_path)
+
+        assert result["width"] == 10.0
+
+    def test_returned_dict_is_a_copy(
+        self, dummy_image_path, mock_gemini
+    ):
+        mock_client = mock_gemini
+        mock_client.models.generate_content.return_value = (
+            _make_response(
+                '{"width": 10, "height": 10, "length": 10}'
+            )
+        )
+
+        estimate_dimensions(dummy_image_path)["width"] = -1
+        assert estimate_dimensions(dummy_image_path)["width"] == 10.0
+
+    def test_cache_stores_tuples(self, dummy_image_path, mock_gemini):
+        mock_client = mock_gemini
+        mock_client.models.generate_content.return_value = (
+            _make_response(
+                '{"width": 10, "height": 20, "length": 30}'
+            )
+        )
+
+        estimate_dimensions(dummy_image_path)
+
+        assert list(vision._DIM_CACHE.values()) == [(10.0, 20.0, 30.0)]
+
+    def test_least_recently_used_entry_evicted(
+        self, tmp_path, mock_gemini
+    ):
+        mock_client = mock_gemini
+        mock_client.models.generate_content.return_value = (
+            _make_response(
+                '{"width": 10, "height": 10, "length": 10}'
+            )
+        )
+        paths = []
+        for i in range(3):
+            path = tmp_path / f"box{i}.jpg"
+            path.write_bytes(bytes([i]))
+            paths.append(str(path))
+
+        with patch("vision._DIM_CACHE_SIZE", 2):
+            for path in paths:
+                estimate_dimensions(path)
+            estimate_dimensions(paths[0])
+
+        assert mock_client.models.generate_content.call_count == 4
+
+    def test_zero_size_disables_cache(
+        self, dummy_image_path, mock_gemini
+    ):
+        mock_client = mock_gemini
+        mock_client.models.generate_content.return_value = (
+            _make_response(
+                '{"width": 10, "height": 10, "length": 10}'
+            )
+        )
+
+        with patch("vision._DIM_CACHE_SIZE", 0):
+            estimate_dimensions(dummy_image_path)
+            estimate_dimensions(dummy_image_path)
+
+        assert mock_client.models.generate_content.call_count == 2
+
+
 # -------------------------------------------------------------------
 # TestSortWithFallback — fallback flow + edge cases
 # -------------------------------------------------------------------
@@ -315,13 +1130,20 @@ class TestSortWithFallback:
         )
         assert result["source"] == "manual"
 
-    @patch("vision.estimate_dimensions")
+    @patch("vision._estimate_checked")
     def test_manual_dims_skips_gemini(self, mock_estimate):
         sort_with_fallback(
             mass=5.0, width=10, height=10, length=10,
         )
         mock_estimate.assert_not_called()
 
+    def test_manual_dims_do_not_log(self, caplog):
+        with caplog.at_level("DEBUG", logger="vision"):
+            sort_with_fallback(
+                mass=5.0, width=10, height=10, length=10,
+            )
+        assert caplog.records == []
+
     def test_manual_dims_standard(self):
         result = sort_with_fallback(
             mass=5.0, width=10, height=10, length=10,
@@ -341,29 +1163,27 @@ class TestSortWithFallback:
         )
         assert result["stack"] == "REJECTED"
 
-    @patch("vision.estimate_dimensions")
-    def test_gemini_fallback_called(self, mock_estimate):
-        mock_estimate.return_value = {
-            "width": 10.0,
-            "height": 10.0,
-            "length": 10.0,
-        }
+    @patch("vision._estimate_checked")
+    def test_gemini_fallback_called(
+        self, mock_estimate, dummy_image_path
+    ):
+        mock_estimate.return_value = (10.0, 10.0, 10.0)
         result = sort_with_fallback(
-            mass=5.0, image_path="box.jpg",
+            mass=5.0, image_path=dummy_image_path,
+        )
+        mock_estimate.assert_called_once_with(
+            Path(dummy_image_path), ".jpg",
         )
-        mock_estimate.assert_called_once_with("box.jpg")
         assert result["source"] == "gemini"
         assert result["stack"] == "STANDARD"
 
-    @patch("vision.estimate_dimensions")
-    def test_gemini_fallback_result_fields(self, mock_estimate):
-        mock_estimate.return_value = {
-            "width": 45.0,
-            "height": 30.0,
-            "length": 60.0,
-        }
+    @patch("vision._estimate_checked")
+    def test_gemini_fallback_result_fields(
+        self, mock_estimate, dummy_image_path
+    ):
+        mock_estimate.return_value = (45.0, 30.0, 60.0)
         result = sort_with_fallback(
-            mass=12.5, image_path="box.jpg",
+            mass=12.5, image_path=dummy_image_path,
         )
         assert result["dimensions"] == {
             "width": 45.0,
@@ -391,14 +1211,64 @@ class TestSortWithFallback:
         assert result["stack"] == "SPECIAL"
         assert result["source"] == "error"
 
-    @patch("vision.estimate_dimensions")
-    def test_gemini_failure_routes_to_special(self, mock_estimate):
+    def test_error_results_are_independent(self):
+        first = sort_with_fallback(mass=5.0)
+        first["stack"] = "MUTATED"
+        second = sort_with_fallback(mass=7.0)
+        assert set(second.keys()) == self._EXPECTED_KEYS
+        assert second["stack"] == "SPECIAL"
+        assert second["mass_kg"] == 7.0
+
+    @patch("vision._estimate_checked")
+    def test_gemini_failure_routes_to_special(
+        self, mock_estimate, dummy_image_path
+    ):
         mock_estimate.side_effect = ValueError("bad image")
         result = sort_with_fallback(
-            mass=5.0, image_path="box.jpg",
+            mass=5.0, image_path=dummy_image_path,
+        )
+        assert result["stack"] == "SPECIAL"
+        assert result["source"] == "error"
+
+    def test_image_path_checked_once(self, dummy_image_path, mock_gemini):
+        mock_gemini.models.generate_content.return_value = _make_response(
+            '{"width": 10, "height": 10, "length": 10}'
+        )
+        with patch(
+            "vision._check_image_path", wraps=vision._check_image_path,
+        ) as mock_check:
+            result = sort_with_fallback(
+                mass=5.0, image_path=dummy_image_path,
+            )
+
+        assert result["source"] == "gemini"
+        mock_check.assert_called_once()
+
+    @patch("vision._get_client")
+    @patch("vision._estimate_checked")
+    def test_missing_image_fails_fast(self, mock_estimate, mock_client):
+        result = sort_with_fallback(
+            mass=5.0, image_path="/no/such/box.jpg",
         )
         assert result["stack"] == "SPECIAL"
         assert result["source"] == "error"
+        mock_estimate.assert_not_called()
+        mock_client.assert_not_called()
+
+    @patch("vision._estimate_checked")
+    def test_unsupported_image_fails_fast(self, mock_estimate, tmp_path):
+        path = tmp_path / "notes.txt"
+        path.write_text("hello")
+        result = sort_with_fallback(mass=5.0, image_path=str(path))
+        assert result["source"] == "error"
+        mock_estimate.assert_not_called()
+
+    def test_non_numeric_mass_routes_to_special(self):
+        result = sort_with_fallback(
+            mass="heavy", width=10, height=10, length=10,
+        )
+        assert result["stack"] == "SPECIAL"
+        assert result["mass_kg"] == "heavy"
 
     def test_invalid_mass_routes_to_special(self):
         result = sort_with_fallback(
@@ -406,3 +1276,167 @@ class TestSortWithFallback:
         )
         assert result["stack"] == "SPECIAL"
         assert result["source"] == "manual"
+
+
+# -------------------------------------------------------------------
+# TestSortMany — batched fallback over many packages
+# -------------------------------------------------------------------
+
+
+class TestSortMany:
+    """Tests for the sort_many function."""
+
+    @patch("vision._estimate_dimensions_batch")
+    def test_manual_packages_skip_gemini(self, mock_batch):
+        results = sort_many([
+            {"mass": 5.0, "width": 10, "height": 10, "length": 10},
+            {"mass": 25.0, "width": 200, "height": 200, "length": 200},
+        ])
+        assert [r["stack"] for r in results] == ["STANDARD", "REJECTED"]
+        assert all(r["source"] == "manual" for r in results)
+        mock_batch.assert_not_called()
+
+    @patch("vision._estimate_dimensions_batch")
+    def test_images_grouped_by_batch_size(self, mock_batch):
+        mock_batch.side_effect = lambda paths: [
+            (10.0, 10.0, 10.0)
+            for _ in paths
+        ]
+        packages = [
+            {"mass": 5.0, "image_path": f"box{i}.jpg"} for i in range(5)
+        ]
+
+        results = sort_many(packages, batch_size=2)
+
+        assert [len(c.args[0]) for c in mock_batch.call_args_list] == [
+            2, 2, 1,
+        ]
+        assert all(r["source"] == "gemini" for r in results)
+        assert all(r["stack"] == "STANDARD" for r in results)
+
+    @patch("vision._estimate_dimensions_batch")
+    def test_results_keep_input_order(self, mock_batch):
+        mock_batch.return_value = [
+            (200.0, 10.0, 10.0),
+            ValueError("image too dark"),
+        ]
+
+        results = sort_many([
+            {"mass": 5.0, "image_path": "big.jpg"},
+            {"mass": 5.0, "width": 10, "height": 10, "length": 10},
+            {"mass": 5.0, "image_path": "dark.jpg"},
+            {"mass": 5.0},
+        ])
+
+        assert [(r["stack"], r["source"]) for r in results] == [
+            ("SPECIAL", "gemini"),
+            ("STANDARD", "manual"),
+            ("SPECIAL", "error"),
+            ("SPECIAL", "error"),
+        ]
+        mock_batch.assert_called_once_with(["big.jpg", "dark.jpg"])
+
+    def test_api_error_keeps_other_results(self, tmp_path, mock_gemini):
+        from google.genai import errors
+
+        mock_gemini.models.generate_content.side_effect = (
+            errors.ClientError(400, {"error": {"message": "bad image"}})
+        )
+        path = tmp_path / "box.jpg"
+        path.write_bytes(b"\x00")
+
+        results = sort_many([
+            {"mass": 5.0, "width": 10, "height": 10, "length": 10},
+            {"mass": 5.0, "image_path": str(path)},
+        ])
+
+        assert [(r["stack"], r["source"]) for r in results] == [
+            ("STANDARD", "manual"),
+            ("SPECIAL", "error"),
+        ]
+
+    @patch("vision._estimate_dimensions_batch")
+    def test_workers_run_batches_concurrently(self, mock_batch):
+        mock_batch.side_effect = lambda paths: [
+            (10.0, 10.0, 10.0)
+            for _ in paths
+        ]
+        packages = [
+            {"mass": 5.0, "image_path": f"box{i}.jpg"} for i in range(6)
+        ]
+
+        results = sort_many(packages, batch_size=2, workers=3)
+
+        assert mock_batch.call_count == 3
+        assert len(results) == 6
+        assert all(r["source"] == "gemini" for r in results)
+
+
+# -------------------------------------------------------------------
+# TestSortManyAsync — concurrent per-image requests
+# -------------------------------------------------------------------
+
+
+class TestSortManyAsync:
+    """Tests for the sort_many_async function."""
+
+    @patch("vision._estimate_dimensions_async", new_callable=AsyncMock)
+    def test_mixed_packages_keep_input_order(self, mock_estimate):
+        mock_estimate.side_effect = [
+            (10.0, 10.0, 10.0),
+            ValueError("image too dark"),
+        ]
+
+        results = asyncio.run(sort_many_async([
+            {"mass": 5.0, "image_path": "a.jpg"},
+            {"mass": 25.0, "width": 200, "height": 200, "length": 200},
+            {"mass": 5.0, "image_path": "b.jpg"},
+        ]))
+
+        assert [(r["stack"], r["source"]) for r in results] == [
+            ("STANDARD", "gemini"),
+            ("REJECTED", "manual"),
+            ("SPECIAL", "error"),
+        ]
+
+    @patch("vision._estimate_dimensions_async", new_callable=AsyncMock)
+    def test_api_error_keeps_other_results(self, mock_estimate):
+        from google.genai import errors
+
+        mock_estimate.side_effect = [
+            errors.ServerError(503, {"error": {"message": "overloaded"}}),
+            (10.0, 10.0, 10.0),
+        ]
+
+        results = asyncio.run(sort_many_async([
+            {"mass": 5.0, "image_path": "a.jpg"},
+            {"mass": 25.0, "width": 200, "height": 200, "length": 200},
+            {"mass": 5.0, "image_path": "b.jpg"},
+        ]))
+
+        assert [(r["stack"], r["source"]) for r in results] == [
+            ("SPECIAL", "error"),
+            ("REJECTED", "manual"),
+            ("STANDARD", "gemini"),
+        ]
+
+    def test_concurrency_limit_respected(self):
+        in_flight = 0
+        peak = 0
+
+        async def fake_estimate(image_path):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return (10.0, 10.0, 10.0)
+
+        packages = [
+            {"mass": 5.0, "image_path": f"box{i}.jpg"} for i in range(10)
+        ]
+        with patch("vision._estimate_dimensions_async", fake_estimate):
+            results = asyncio.run(sort_many_async(packages, concurrency=3))
+
+        assert peak == 3
+        assert all(r["source"] == "gemini" for r in results)
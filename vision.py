@@ -1,27 +1,108 @@
 """Vision-based package dimension estimation using Google Gemini."""
 
+import functools
+import hashlib
+import importlib.util
+import io
 import json
 import logging
 import os
 import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable
 
 logger = logging.getLogger(__name__)
 
-from google import genai
-from google.genai import types
-from PIL import Image
-
 from sort_packages import sort_with_details
+from vision_dims import Dims as _Dims
+from vision_dims import validate_dims as _validate_dims
+
+# google.genai (~400 ms), Pillow and asyncio are imported inside the
+# functions that use them, so callers that only sort with manual
+# dimensions never pay for them.
+if TYPE_CHECKING:
+    from google import genai
+
+# orjson is an optional, faster drop-in for parsing response text. The
+# SDK decodes schema-constrained output into response.parsed with the
+# stdlib, so this only runs on the _parse_dimensions* fallback. Its
+# JSONDecodeError subclasses json.JSONDecodeError, so error handling
+# is the same either way.
+try:
+    import orjson
+    _json_loads: Callable[[str], Any] = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Optional leading ```/```json and trailing ``` fence around the JSON;
+# both are optional, so the pattern always matches in a single pass.
+_FENCE_RE = re.compile(r"^(?:```(?:json)?)?\s*(.*?)\s*(?:```)?$", re.DOTALL)
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read a non-negative integer setting from the environment.
+
+    Settings are read at import time, so a malformed or negative
+    value is logged and replaced with default rather than making
+    ``import vision`` fail.
+
+    Args:
+        name: Environment variable name.
+        default: Value used when the variable is unset or invalid.
 
-_SUPPORTED_EXTENSIONS = {
-    ".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp",
+    Returns:
+        The parsed value, or default.
+    """
+    raw = os.environ.get(name)
+    if raw is None:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        value = -1
+    if value < 0:
+        logger.warning(
+            "Ignoring %s=%r: expected a non-negative integer; "
+            "using %d", name, raw, default,
+        )
+        return default
+    return value
+
+
+# MIME type by file suffix. Only used for files Pillow cannot read;
+# otherwise the type comes from the decoded image header.
+_MIME_TYPES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".webp": "image/webp",
+    ".gif": "image/gif",
+    ".bmp": "image/bmp",
 }
 
-_PROMPT = (
-    "You are analyzing an image of a shipping package or box. "
-    "Estimate the width, height, and length of the package "
-    "in centimeters.\n\n"
+_SUPPORTED_EXTENSIONS = frozenset(_MIME_TYPES)
+_SUPPORTED_EXT_LIST = ", ".join(sorted(_SUPPORTED_EXTENSIONS))
+
+# Pillow formats Gemini accepts as uploaded (MPO is the multi-picture
+# JPEG many phones write). Anything else, e.g. GIF or BMP, is
+# re-encoded as PNG before upload.
+_UPLOAD_MIME_TYPES = {
+    "JPEG": "image/jpeg",
+    "MPO": "image/jpeg",
+    "PNG": "image/png",
+    "WEBP": "image/webp",
+}
+
+# Longest side, in pixels, of the image sent to Gemini. Larger photos
+# are downscaled first; box-shape estimation gains nothing from more
+# detail, and upload size and vision tokens grow with resolution.
+# VISION_MAX_DIM=0 sends every image at full size.
+_MAX_DIM = _env_int("VISION_MAX_DIM", 1024)
+
+_RULES = (
     "IMPORTANT RULES:\n"
     "- Only estimate dimensions if you can clearly see a "
     "single package and can reasonably judge its size.\n"
@@ -31,8 +112,9 @@ _PROMPT = (
     "- If there are multiple packages, return an error.\n"
     "- If the object is not a shipping package or box, "
     "return an error.\n\n"
-    "RESPONSE FORMAT — respond with ONLY a JSON object, "
-    "no other text:\n\n"
+)
+
+_RESPONSE_SHAPES = (
     "On success:\n"
     '{"width": <number>, "height": <number>, '
     '"length": <number>}\n\n'
@@ -44,13 +126,76 @@ _PROMPT = (
     '{"error": "cannot determine dimensions from this angle"}\n'
 )
 
+_PROMPT = (
+    "You are analyzing an image of a shipping package or box. "
+    "Estimate the width, height, and length of the package "
+    "in centimeters.\n\n"
+    + _RULES
+    + "RESPONSE FORMAT — respond with ONLY a JSON object, "
+    "no other text:\n\n"
+    + _RESPONSE_SHAPES
+)
+
+_BATCH_PROMPT = (
+    "You are analyzing several images, each of a shipping package "
+    "or box. For every image independently, estimate the width, "
+    "height, and length of the package in centimeters.\n\n"
+    + _RULES
+    + "RESPONSE FORMAT — respond with ONLY a JSON array, no other "
+    "text, containing exactly one object per image in the same "
+    "order as the images. Each object has one of these shapes:\n\n"
+    + _RESPONSE_SHAPES
+)
+
+
+# Structured-output schemas, so Gemini always returns bare JSON in
+# the right shape. Every field is optional so that the {"error": ...}
+# shape is also valid; _validate_dims tells the two apart. Without
+# propertyOrdering Gemini emits the keys alphabetically, which puts
+# "error" first and nudges the model towards an error.
+_DIMS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "width": {"type": "NUMBER"},
+        "height": {"type": "NUMBER"},
+        "length": {"type": "NUMBER"},
+        "error": {"type": "STRING"},
+    },
+    "propertyOrdering": ["width", "height", "length", "error"],
+}
+
+_BATCH_SCHEMA = {"type": "ARRAY", "items": _DIMS_SCHEMA}
+
+_MODEL = "gemini-2.5-flash"
 
 _SECRET_NAME = "GOOGLE_API_KEY"
 
+# Estimates keyed by a hash of the image bytes, so re-scans of the
+# same package skip the Gemini call. Least recently used entries are
+# evicted first; the lock makes it safe for concurrent workers.
+# VISION_CACHE_SIZE=0 disables caching.
+_DIM_CACHE_SIZE = _env_int("VISION_CACHE_SIZE", 1024)
+_DIM_CACHE: "OrderedDict[bytes, _Dims]" = OrderedDict()
+_DIM_CACHE_LOCK = threading.Lock()
 
+# One Gemini client per process, created on first use.
+_CLIENT: "genai.Client | None" = None
+_CLIENT_LOCK = threading.Lock()
+
+# Keep-alive pool for the client's HTTP transport, so back-to-back
+# requests reuse open TLS connections. HTTP/2 is used when the
+# optional h2 package is installed.
+_MAX_KEEPALIVE_CONNECTIONS = 32
+_MAX_CONNECTIONS = 64
+
+
+@functools.lru_cache(maxsize=1)
 def _get_api_key():
     """Retrieve the Gemini API key from the best available source.
 
+    The key is resolved once per process and then cached; call
+    _reset_client() to pick up a rotated key.
+
     Resolution order:
         1. .env file (local development)
         2. AWS Secrets Manager (production)
@@ -94,8 +239,34 @@ def _get_api_key():
     )
 
 
+def _http_options():
+    """Build transport options for the shared Gemini client.
+
+    client_args and async_client_args were added in google-genai
+    1.11.0, hence the lower bound in requirements.txt.
+
+    Returns:
+        A google.genai.types.HttpOptions with a pooled httpx
+        transport for both the sync and aio clients.
+    """
+    import httpx
+    from google.genai import types
+
+    client_args = {
+        "http2": importlib.util.find_spec("h2") is not None,
+        "limits": httpx.Limits(
+            max_keepalive_connections=_MAX_KEEPALIVE_CONNECTIONS,
+            max_connections=_MAX_CONNECTIONS,
+        ),
+    }
+    return types.HttpOptions(
+        client_args=client_args,
+        async_client_args=dict(client_args),
+    )
+
+
 def _get_client():
-    """Build a Gemini client from the best available key source.
+    """Return the shared Gemini client, creating it on first use.
 
     Returns:
         A google.genai.Client instance.
@@ -103,84 +274,174 @@ def _get_client():
     Raises:
         EnvironmentError: If no API key can be found.
     """
-    api_key = _get_api_key()
-    client = genai.Client(api_key=api_key)
-    del api_key
+    global _CLIENT
+    client = _CLIENT
+    if client is None:
+        from google import genai
+
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                _CLIENT = genai.Client(
+                    api_key=_get_api_key(),
+                    http_options=_http_options(),
+                )
+            client = _CLIENT
     return client
 
 
-def _parse_dimensions(response_text):
-    """Extract width, height, and length from a JSON response.
+def _reset_client():
+    """Drop the cached client and API key so both are re-resolved."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        _CLIENT = None
+        _get_api_key.cache_clear()
 
-    Handles markdown code fences and extra whitespace.
+
+def _load_json(response_text: str) -> object:
+    """Decode a Gemini response, stripping any markdown code fence.
 
     Args:
         response_text: Raw text from the Gemini API response.
 
     Returns:
-        A dict with "width", "height", "length" as floats.
+        The decoded JSON value.
 
     Raises:
-        ValueError: If the response cannot be parsed or is invalid.
+        ValueError: If the response is not valid JSON.
     """
     cleaned = response_text.strip()
-    cleaned = re.sub(r"^```(?:json)?\s*", "", cleaned)
-    cleaned = re.sub(r"\s*```$", "", cleaned)
-    cleaned = cleaned.strip()
+    # JSON mode responses almost never carry a fence; skip the regex.
+    if cleaned.startswith("```") or cleaned.endswith("```"):
+        match = _FENCE_RE.match(cleaned)
+        if match:
+            cleaned = match.group(1)
 
     try:
-        data = json.loads(cleaned)
+        return _json_loads(cleaned)
     except json.JSONDecodeError as exc:
         raise ValueError(
             "Could not parse Gemini response as JSON: "
             f"{response_text!r}"
         ) from exc
 
-    if "error" in data:
+
+def _parse_dimensions(response_text: str) -> _Dims:
+    """Extract width, height, and length from a JSON response.
+
+    Handles markdown code fences and extra whitespace.
+
+    Args:
+        response_text: Raw text from the Gemini API response.
+
+    Returns:
+        A (width, height, length) tuple of floats.
+
+    Raises:
+        ValueError: If the response cannot be parsed or is invalid.
+    """
+    data = _load_json(response_text)
+    if not isinstance(data, dict):
+        raise ValueError(
+            "Gemini response is not a JSON object: "
+            f"{response_text!r}"
+        )
+
+    return _validate_dims(data)
+
+
+def _parse_dimensions_list(
+    response_text: str, count: int,
+) -> list[_Dims | ValueError]:
+    """Extract per-image dimensions from a batched JSON response.
+
+    One bad entry does not fail the others: each position holds
+    either the dimensions or the ValueError for that image.
+
+    Args:
+        response_text: Raw text from the Gemini API response.
+        count: Number of images that were sent.
+
+    Returns:
+        A list of length count with a (width, height, length)
+        tuple or a ValueError per image, in input order.
+
+    Raises:
+        ValueError: If the response is not a JSON array with one
+            entry per image.
+    """
+    return _validate_dims_list(_load_json(response_text), count)
+
+
+def _validate_dims_list(
+    data: object, count: int,
+) -> list[_Dims | ValueError]:
+    """Check a decoded batched response; see _parse_dimensions_list."""
+    if not isinstance(data, list) or len(data) != count:
         raise ValueError(
-            "Gemini could not estimate dimensions: "
-            f"{data['error']}"
+            f"Expected a JSON array of {count} results from Gemini: "
+            f"{data!r}"
         )
 
-    for key in ("width", "height", "length"):
-        if key not in data:
-            raise ValueError(
-                f"Missing '{key}' in Gemini response: "
-                f"{response_text!r}"
-            )
-        value = data[key]
-        if not isinstance(value, (int, float)):
-            raise ValueError(
-                f"'{key}' must be a number, "
-                f"got {type(value).__name__}"
-            )
-        if value <= 0:
-            raise ValueError(
-                f"'{key}' must be positive, got {value}"
-            )
+    results: list[_Dims | ValueError] = []
+    for item in data:
+        if not isinstance(item, dict):
+            results.append(ValueError(
+                f"Gemini batch entry is not a JSON object: {item!r}"
+            ))
+            continue
+        try:
+            results.append(_validate_dims(item))
+        except ValueError as exc:
+            results.append(exc)
+    return results
 
-    return {
-        "width": float(data["width"]),
-        "height": float(data["height"]),
-        "length": float(data["length"]),
-    }
 
+def _dims_from_response(response: Any) -> _Dims:
+    """Extract dimensions from a single-image Gemini response.
 
-def estimate_dimensions(image_path):
-    """Send an image to Gemini and return estimated box dimensions.
+    With response_schema set, the SDK has already decoded the JSON
+    into response.parsed, so only the values need checking. Falls
+    back to parsing response.text when parsed is unavailable (older
+    SDKs, or a response the SDK could not decode). Error messages
+    quote the decoded value, so response.text, which joins the
+    response parts on every access, is only read on that fallback.
 
     Args:
-        image_path: Path to an image file
-            (JPEG, PNG, WebP, GIF, BMP).
+        response: A GenerateContentResponse.
 
     Returns:
-        A dict with "width", "height", "length" in centimeters.
+        A (width, height, length) tuple of floats.
+
+    Raises:
+        ValueError: If the response cannot be parsed or is invalid.
+    """
+    parsed = getattr(response, "parsed", None)
+    if isinstance(parsed, dict):
+        return _validate_dims(parsed)
+    return _parse_dimensions(response.text)
+
+
+def _dims_list_from_response(
+    response: Any, count: int,
+) -> list[_Dims | ValueError]:
+    """Batched counterpart of _dims_from_response."""
+    parsed = getattr(response, "parsed", None)
+    if isinstance(parsed, list):
+        return _validate_dims_list(parsed, count)
+    return _parse_dimensions_list(response.text, count)
+
+
+def _check_image_path(
+    image_path: "str | os.PathLike[str]",
+) -> tuple[Path, str]:
+    """Check that an image path names a supported, existing file.
+
+    Returns:
+        A (Path, lowercase suffix) tuple for the file.
 
     Raises:
         FileNotFoundError: If the image file does not exist.
-        ValueError: If the file type is unsupported or the
-            response cannot be parsed into valid dimensions.
-        EnvironmentError: If GOOGLE_API_KEY is not set.
+        ValueError: If the file type is unsupported.
     """
     path = Path(image_path)
     if not path.is_file():
@@ -192,30 +453,364 @@ def estimate_dimensions(image_path):
     if suffix not in _SUPPORTED_EXTENSIONS:
         raise ValueError(
             f"Unsupported image format '{suffix}'. "
-            f"Supported: {', '.join(sorted(_SUPPORTED_EXTENSIONS))}"
+            f"Supported: {_SUPPORTED_EXT_LIST}"
         )
 
-    image = Image.open(path)
+    return path, suffix
+
+
+def _read_image(
+    image_path: "str | os.PathLike[str]",
+) -> tuple[bytes, str]:
+    """Check that an image path is usable and read it.
+
+    Returns:
+        A (bytes, MIME type) tuple for the file.
+
+    Raises:
+        FileNotFoundError: If the image file does not exist.
+        ValueError: If the file type is unsupported.
+    """
+    path, suffix = _check_image_path(image_path)
+    return path.read_bytes(), _MIME_TYPES[suffix]
+
+
+def _image_key(data: bytes) -> bytes:
+    """Return the dimension-cache key for raw image bytes."""
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _cache_get(key: bytes) -> _Dims | None:
+    """Return the cached dimensions for key, if any."""
+    with _DIM_CACHE_LOCK:
+        cached = _DIM_CACHE.get(key)
+        if cached is not None:
+            _DIM_CACHE.move_to_end(key)
+        return cached
+
+
+def _cache_put(key: bytes, dims: _Dims) -> None:
+    """Store dimensions under key, evicting the oldest if full."""
+    with _DIM_CACHE_LOCK:
+        _DIM_CACHE[key] = dims
+        if len(_DIM_CACHE) > _DIM_CACHE_SIZE:
+            _DIM_CACHE.popitem(last=False)
+
+
+def _prepare_image(data, mime_type):
+    """Return the image bytes and MIME type to upload to Gemini.
+
+    JPEG, PNG and WebP images are sent as-is, labelled with the
+    format Pillow detects rather than the file suffix. Other formats
+    are re-encoded as PNG. Images whose longest side exceeds
+    _MAX_DIM are resized to fit within _MAX_DIM x _MAX_DIM, turned
+    upright per their EXIF orientation (the re-encoded JPEG carries
+    no orientation tag), and re-encoded as JPEG. Data Pillow cannot
+    read is returned unchanged for Gemini to handle.
+
+    Args:
+        data: Raw image bytes.
+        mime_type: MIME type from the file suffix, used only if
+            Pillow cannot read data.
+
+    Returns:
+        A (bytes, MIME type) tuple for the image to send.
+
+    Raises:
+        ValueError: If the image exceeds Pillow's decompression-bomb
+            pixel limit.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        # Opening only reads the header, so the checks are cheap.
+        with Image.open(io.BytesIO(data)) as image:
+            upload_type = _UPLOAD_MIME_TYPES.get(image.format or "")
+            if 0 < _MAX_DIM < max(image.size):
+                image.thumbnail(
+                    (_MAX_DIM, _MAX_DIM), Image.Resampling.LANCZOS,
+                )
+                # After thumbnail, so JPEGs still decode at reduced
+                # size; the bound is square, so rotating cannot
+                # push the result past _MAX_DIM.
+                ImageOps.exif_transpose(image, in_place=True)
+                if image.mode != "RGB":
+                    image = image.convert("RGB")
+                save_args = {"format": "JPEG", "quality": 85}
+                upload_type = "image/jpeg"
+            elif upload_type is not None:
+                return data, upload_type
+            else:
+                save_args = {"format": "PNG"}
+                upload_type = "image/png"
+            buffer = io.BytesIO()
+            image.save(buffer, **save_args)
+    except Image.DecompressionBombError as exc:
+        raise ValueError(f"Image too large to process: {exc}") from exc
+    except (UnidentifiedImageError, OSError) as exc:
+        logger.debug("Sending image as read: %s", exc)
+        return data, mime_type
+
+    return buffer.getvalue(), upload_type
+
+
+def _image_part(data, mime_type):
+    """Wrap image bytes as a Gemini content part; see _prepare_image."""
+    from google.genai import types
+
+    data, mime_type = _prepare_image(data, mime_type)
+    return types.Part.from_bytes(data=data, mime_type=mime_type)
+
+
+@functools.lru_cache(maxsize=2)
+def _generate_config(batch=False):
+    """Return the shared request config, built on first use.
+
+    The config is the same for every request, so one instance is
+    reused instead of being rebuilt and re-validated per call. The
+    SDK copies a config before modifying it.
+
+    Args:
+        batch: True for multi-image requests, which expect an array
+            of results.
+
+    Returns:
+        A google.genai.types.GenerateContentConfig.
+    """
+    from google.genai import types
+
+    return types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_schema=_BATCH_SCHEMA if batch else _DIMS_SCHEMA,
+    )
+
+
+def _request(data, mime_type):
+    """Build generate_content keyword arguments for one image."""
+    # contents must be a list: the SDK rejects tuples.
+    return {
+        "model": _MODEL,
+        "contents": [_image_part(data, mime_type), _PROMPT],
+        "config": _generate_config(),
+    }
+
+
+def _dims_dict(dims: _Dims) -> dict[str, float]:
+    """Convert a (width, height, length) tuple to the public dict."""
+    return {"width": dims[0], "height": dims[1], "length": dims[2]}
+
+
+def estimate_dimensions(image_path):
+    """Send an image to Gemini and return estimated box dimensions.
+
+    Results are cached by image content, so the same image is only
+    sent to Gemini once (until evicted from the cache).
+
+    Args:
+        image_path: Path to an image file
+            (JPEG, PNG, WebP, GIF, BMP).
+
+    Returns:
+        A dict with "width", "height", "length" in centimeters.
+
+    Raises:
+        FileNotFoundError: If the image file does not exist.
+        ValueError: If the file type is unsupported or the
+            response cannot be parsed into valid dimensions.
+        EnvironmentError: If GOOGLE_API_KEY is not set.
+    """
+    return _dims_dict(_estimate_dimensions(image_path))
+
+
+def _estimate_dimensions(image_path) -> _Dims:
+    """estimate_dimensions, returning a (w, h, l) tuple."""
+    return _estimate_checked(*_check_image_path(image_path))
+
+
+def _estimate_checked(path: Path, suffix: str) -> _Dims:
+    """_estimate_dimensions for a path _check_image_path accepted."""
+    data = path.read_bytes()
+    mime_type = _MIME_TYPES[suffix]
+    key = _image_key(data)
+    cached = _cache_get(key)
+    if cached is not None:
+        # Cache hits are the hot path; skip the logging call entirely.
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Dimension cache hit for %s", path)
+        return cached
+
     client = _get_client()
+    response = client.models.generate_content(**_request(data, mime_type))
 
-    response = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=[image, _PROMPT],
-        config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-        ),
+    dims = _dims_from_response(response)
+    _cache_put(key, dims)
+    return dims
+
+
+async def estimate_dimensions_async(image_path):
+    """Async variant of estimate_dimensions using Gemini's aio client.
+
+    Shares the dimension cache with estimate_dimensions. Many calls
+    can be awaited concurrently; see sort_many_async.
+
+    Args:
+        image_path: Path to an image file
+            (JPEG, PNG, WebP, GIF, BMP).
+
+    Returns:
+        A dict with "width", "height", "length" in centimeters.
+
+    Raises:
+        FileNotFoundError: If the image file does not exist.
+        ValueError: If the file type is unsupported or the
+            response cannot be parsed into valid dimensions.
+        EnvironmentError: If GOOGLE_API_KEY is not set.
+    """
+    return _dims_dict(await _estimate_dimensions_async(image_path))
+
+
+def _client_and_request(data, mime_type):
+    """Return the shared client and the request kwargs for one image."""
+    return _get_client(), _request(data, mime_type)
+
+
+async def _estimate_dimensions_async(image_path) -> _Dims:
+    """estimate_dimensions_async, returning a (w, h, l) tuple."""
+    import asyncio
+
+    data, mime_type = await asyncio.to_thread(_read_image, image_path)
+    key = _image_key(data)
+    cached = _cache_get(key)
+    if cached is not None:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Dimension cache hit for %s", image_path)
+        return cached
+
+    # Creating the client on first use (key lookup, possibly a
+    # Secrets Manager call) blocks, and re-encoding is CPU-bound, so
+    # keep both off the event loop.
+    client, request = await asyncio.to_thread(
+        _client_and_request, data, mime_type,
     )
+    response = await client.aio.models.generate_content(**request)
 
-    return _parse_dimensions(response.text)
+    dims = _dims_from_response(response)
+    _cache_put(key, dims)
+    return dims
+
+
+def estimate_dimensions_batch(image_paths):
+    """Estimate dimensions for several images with one Gemini call.
+
+    Cached images and images that fail the file checks are not
+    sent. All remaining images go into a single request, which
+    amortizes the round trip across the batch. Failures are
+    returned per image instead of raised, so one bad image does
+    not fail the others.
+
+    Args:
+        image_paths: Sequence of image file paths.
+
+    Returns:
+        A list in input order holding, for each image, either a
+        dict with "width", "height", "length" in centimeters or
+        the exception (FileNotFoundError, ValueError,
+        EnvironmentError, or google.genai.errors.APIError) that
+        estimate_dimensions would raise.
+    """
+    return [
+        _dims_dict(item) if isinstance(item, tuple) else item
+        for item in _estimate_dimensions_batch(image_paths)
+    ]
+
+
+def _estimate_dimensions_batch(image_paths):
+    """estimate_dimensions_batch, with (w, h, l) tuples for dims."""
+    results = [None] * len(image_paths)
+    pending = []
+    for index, image_path in enumerate(image_paths):
+        try:
+            data, mime_type = _read_image(image_path)
+        except (ValueError, FileNotFoundError) as exc:
+            results[index] = exc
+            continue
+        key = _image_key(data)
+        cached = _cache_get(key)
+        if cached is not None:
+            results[index] = cached
+            continue
+        try:
+            part = _image_part(data, mime_type)
+        except ValueError as exc:
+            results[index] = exc
+            continue
+        pending.append((index, key, part))
+
+    if not pending:
+        return results
+
+    from google.genai import errors
+
+    logger.info("Sending %d images to Gemini in one request", len(pending))
+    try:
+        client = _get_client()
+        response = client.models.generate_content(
+            model=_MODEL,
+            contents=[
+                *(part for _, _, part in pending),
+                _BATCH_PROMPT,
+            ],
+            config=_generate_config(batch=True),
+        )
+        parsed = _dims_list_from_response(response, len(pending))
+    except (ValueError, EnvironmentError, errors.APIError) as exc:
+        # A failed request (bad response, missing key, HTTP error)
+        # fails only the images in this batch.
+        parsed = [exc] * len(pending)
+
+    for (index, key, _), item in zip(pending, parsed):
+        if isinstance(item, tuple):
+            _cache_put(key, item)
+        results[index] = item
+    return results
+
+
+# Everything but mass_kg is fixed for packages with no usable dims.
+_ERROR_TEMPLATE: dict[str, Any] = {
+    "stack": "SPECIAL",
+    "source": "error",
+    "dimensions": None,
+    "volume_cm3": None,
+    "is_bulky": None,
+    "is_heavy": None,
+}
+
+
+def _error_result(mass: object) -> dict[str, Any]:
+    """Build the SPECIAL result for a package with no usable dims."""
+    return {**_ERROR_TEMPLATE, "mass_kg": mass}
+
+
+def _sorted_result(
+    width: object,
+    height: object,
+    length: object,
+    mass: object,
+    source: str,
+) -> dict[str, Any]:
+    """Sort a package and tag the result dict with its dims source."""
+    result = sort_with_details(width, height, length, mass).to_dict()
+    result["source"] = source
+    return result
 
 
 def sort_with_fallback(
-    mass,
-    width=None,
-    height=None,
-    length=None,
-    image_path=None,
-):
+    mass: object,
+    width: object = None,
+    height: object = None,
+    length: object = None,
+    image_path: "str | os.PathLike[str] | None" = None,
+) -> dict[str, Any]:
     """Sort a package using manual dimensions or Gemini fallback.
 
     Tries manual dimensions first. If any dimension is None,
@@ -236,41 +831,138 @@ def sort_with_fallback(
         A dict with keys: stack, source, dimensions, volume_cm3,
         mass_kg, is_bulky, is_heavy.
     """
-    def _error_result():
-        return {
-            "stack": "SPECIAL",
-            "source": "error",
-            "dimensions": None,
-            "volume_cm3": None,
-            "mass_kg": mass,
-            "is_bulky": None,
-            "is_heavy": None,
-        }
-
-    dims = [width, height, length]
-    provided = [d is not None for d in dims]
-
-    if all(provided):
+    provided = (
+        (width is not None)
+        + (height is not None)
+        + (length is not None)
+    )
+
+    if provided == 3:
         source = "manual"
-        logger.debug("Using manual dimensions")
-    elif not any(provided):
+    elif provided == 0:
         if image_path is None:
             logger.warning("No dimensions or image provided")
-            return _error_result()
+            return _error_result(mass)
+        # Reject a bad path before touching the Gemini client; the
+        # checked path is passed on so the file is not stat'ed again.
+        try:
+            path, suffix = _check_image_path(image_path)
+        except (ValueError, FileNotFoundError) as exc:
+            logger.error("Gemini fallback failed: %s", exc)
+            return _error_result(mass)
         try:
             logger.info("Falling back to Gemini for dimensions")
-            estimated = estimate_dimensions(image_path)
+            width, height, length = _estimate_checked(path, suffix)
         except (ValueError, FileNotFoundError, EnvironmentError) as exc:
             logger.error("Gemini fallback failed: %s", exc)
-            return _error_result()
-        width = estimated["width"]
-        height = estimated["height"]
-        length = estimated["length"]
+            return _error_result(mass)
         source = "gemini"
     else:
         logger.warning("Partial dimensions provided, routing to SPECIAL")
-        return _error_result()
+        return _error_result(mass)
 
-    result = sort_with_details(width, height, length, mass)
-    result["source"] = source
-    return result
+    return _sorted_result(width, height, length, mass, source)
+
+
+def _needs_gemini(package):
+    """Return True if a sort_many package must use the image."""
+    return (
+        package.get("image_path") is not None
+        and package.get("width") is None
+        and package.get("height") is None
+        and package.get("length") is None
+    )
+
+
+def sort_many(packages, batch_size=8, workers=16):
+    """Sort many packages, batching their Gemini fallbacks.
+
+    Packages with manual dimensions (or invalid arguments) are
+    handled exactly as sort_with_fallback would. Packages that
+    need Gemini are grouped into requests of up to batch_size
+    images via estimate_dimensions_batch, and up to workers of
+    those requests run concurrently in a thread pool.
+
+    Args:
+        packages: Iterable of dicts of sort_with_fallback keyword
+            arguments (mass, width, height, length, image_path).
+        batch_size: Maximum number of images per Gemini request.
+        workers: Maximum number of Gemini requests in flight.
+
+    Returns:
+        A list of sort_with_fallback result dicts, in input order.
+    """
+    packages = list(packages)
+    results = [None] * len(packages)
+    needs_gemini = []
+    for index, package in enumerate(packages):
+        if _needs_gemini(package):
+            needs_gemini.append(index)
+        else:
+            results[index] = sort_with_fallback(**package)
+
+    chunks = [
+        needs_gemini[start:start + batch_size]
+        for start in range(0, len(needs_gemini), batch_size)
+    ]
+    if not chunks:
+        return results
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        batches = pool.map(
+            _estimate_dimensions_batch,
+            [[packages[i]["image_path"] for i in chunk] for chunk in chunks],
+        )
+        for chunk, estimates in zip(chunks, batches):
+            for index, estimated in zip(chunk, estimates):
+                mass = packages[index]["mass"]
+                if isinstance(estimated, Exception):
+                    logger.error("Gemini fallback failed: %s", estimated)
+                    results[index] = _error_result(mass)
+                else:
+                    results[index] = _sorted_result(
+                        *estimated, mass, "gemini",
+                    )
+    return results
+
+
+async def sort_many_async(packages, concurrency=16):
+    """Sort many packages, running their Gemini calls concurrently.
+
+    Each package that needs Gemini gets its own request via
+    estimate_dimensions_async; at most concurrency requests are
+    in flight at once. Other packages are handled exactly as
+    sort_with_fallback would.
+
+    Args:
+        packages: Iterable of dicts of sort_with_fallback keyword
+            arguments (mass, width, height, length, image_path).
+        concurrency: Maximum number of Gemini requests in flight.
+
+    Returns:
+        A list of sort_with_fallback result dicts, in input order.
+    """
+    import asyncio
+
+    from google.genai import errors
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def sort_one(package):
+        if not _needs_gemini(package):
+            return sort_with_fallback(**package)
+        mass = package["mass"]
+        try:
+            async with semaphore:
+                estimated = await _estimate_dimensions_async(
+                    package["image_path"]
+                )
+        except (
+            ValueError, FileNotFoundError, EnvironmentError,
+            errors.APIError,
+        ) as exc:
+            logger.error("Gemini fallback failed: %s", exc)
+            return _error_result(mass)
+        return _sorted_result(*estimated, mass, "gemini")
+
+    return list(await asyncio.gather(*(sort_one(p) for p in packages)))
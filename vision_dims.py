@@ -0,0 +1,58 @@
+"""Checks for the dimensions decoded from a Gemini response.
+
+Kept apart from vision.py so that only this hot path is compiled by
+the optional mypyc build (see setup.py); vision.py stays interpreted,
+which keeps its functions patchable in tests.
+"""
+
+# (width, height, length) in centimeters. Used internally; the public
+# estimate_* functions convert to a dict only at the boundary.
+Dims = tuple[float, float, float]
+
+
+def validate_dims(data: dict[str, object]) -> Dims:
+    """Check a decoded Gemini response and extract the dimensions.
+
+    An empty or null "error" counts as no error, since the schema
+    lets Gemini emit the key alongside valid dimensions.
+
+    Args:
+        data: The decoded JSON object.
+
+    Returns:
+        A (width, height, length) tuple of floats.
+
+    Raises:
+        ValueError: If the response reports an error or any
+            dimension is missing, non-numeric, or not positive.
+    """
+    if data.get("error"):
+        raise ValueError(
+            "Gemini could not estimate dimensions: "
+            f"{data['error']}"
+        )
+
+    return (
+        dim_value(data, "width"),
+        dim_value(data, "height"),
+        dim_value(data, "length"),
+    )
+
+
+def dim_value(data: dict[str, object], key: str) -> float:
+    """Return one checked dimension from a decoded response."""
+    if key not in data:
+        raise ValueError(
+            f"Missing '{key}' in Gemini response: {data!r}"
+        )
+    value = data[key]
+    if not isinstance(value, (int, float)):
+        raise ValueError(
+            f"'{key}' must be a number, "
+            f"got {type(value).__name__}"
+        )
+    if value <= 0:
+        raise ValueError(
+            f"'{key}' must be positive, got {value}"
+        )
+    return float(value)